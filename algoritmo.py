@@ -1,204 +1,305 @@
 import numpy as np
-import pandas as pd
-from scipy.integrate import odeint
 import plotly.graph_objects as go
+from dash import Patch
+from metricas import medir
 from plotly.subplots import make_subplots
+from nucleo import (
+    AFP_TASA, C2, R_3, R_7, MESES_MAX_OBJETIVO, MAX_ESCENARIOS, INFLACION_POR_NIVEL, PESOS_FACTOR,
+    leer_gastos, inflacion_anual, leer_categorias, agrupar_categorias, matriz_gastos, calcular_factor_ahorro,
+    construir_modelo, solucion_analitica, saldo_analitico, serie_uniforme, verificar_solver_analitico,
+    resolver_EDO_lote, resolver_EDO, buscar_objetivo, simular_poblacion, evaluar_escenarios, calcular_proyecciones
+)
 
-# Constantes
-AFP_TASA = 0.1271
-C2 = 0.01
-R_3 = 0.03 / 12
-R_7 = 0.07 / 12
+# El cálculo vive en nucleo.py; aquí quedan los gráficos de Plotly de la interfaz y
+# se reexporta el núcleo para el código que importa desde algoritmo
 
-def leer_gastos(file_data):
-    if not file_data:
-        return 0
-    
-    try:
-        df = pd.read_json(file_data, orient='split')
-        if 'Gasto mensual estimado' in df.columns:
-            gasto = float(df['Gasto mensual estimado'].sum())
-            return gasto if gasto >= 0 else 0
-        return 0
-    except Exception as e:
-        print(f"Error procesando archivo: {str(e)}")
-        return 0
-
-def calcular_factor_ahorro(variables):
-    """Calcula un factor de ajuste basado en las variables que afectan al ahorro"""
-    factor = 1.0
-    factor *= variables.get('expectativas_ingresos', 1.0) ** 0.15
-    factor *= variables.get('tasa_interes', 1.0) ** 0.1
-    factor *= variables.get('inflacion', 1.0) ** 0.2
-    factor *= variables.get('preferencias_temporales', 1.0) ** 0.15
-    factor *= variables.get('educacion_financiera', 1.0) ** 0.1
-    factor *= variables.get('riesgo_desempleo', 1.0) ** 0.1
-    factor *= variables.get('situacion_familiar', 1.0) ** 0.1
-    factor *= variables.get('gastos_salud', 1.0) ** 0.05
-    factor *= variables.get('estabilidad_laboral', 1.0) ** 0.05
-    return factor
+# Las series más largas se reducen con LTTB y, sobre el umbral, se dibujan con WebGL
+MAX_PUNTOS_SERIE = 800
+UMBRAL_WEBGL = 2000
 
-def construir_modelo(ahorro_mensual, gI, r, factor_ahorro):
-    def modelo(A, t):
-        ahorro_t = ahorro_mensual * np.exp(gI * t) * (1 / factor_ahorro)
-        return ahorro_t + (C2 + r) * A
-    return modelo
+def lttb(x, y, n_puntos):
+    """Índices de los puntos elegidos por Largest-Triangle-Three-Buckets.
 
-def resolver_EDO(salario, gasto, tasa_crecimiento, meses, variables_ahorro):
-    gI = (tasa_crecimiento / 100) / 12
-    I0 = salario * (1 - AFP_TASA)
+    Conserva el primero y el último y, de cada bucket intermedio, el punto que
+    forma el triángulo de mayor área con el elegido antes y el promedio del
+    bucket siguiente, así se mantienen los picos y la forma de la curva.
+    """
+    n = len(x)
+    if n_puntos >= n or n_puntos < 3:
+        return np.arange(n)
     
-    ahorro_mensual = I0 - gasto
-    t = np.linspace(0, meses, meses)
-    A0 = 0
-    factor_ahorro = calcular_factor_ahorro(variables_ahorro)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    bordes = np.linspace(1, n - 1, n_puntos - 1).astype(int)
+    # Promedio de cada bucket; el último punto hace de promedio tras el último bucket
+    largos = np.diff(bordes)
+    x_prom = np.append(np.add.reduceat(x[:-1], bordes[:-1]) / largos, x[-1])
+    y_prom = np.append(np.add.reduceat(y[:-1], bordes[:-1]) / largos, y[-1])
     
-    A_3 = odeint(construir_modelo(ahorro_mensual, gI, R_3, factor_ahorro), A0, t).flatten()
-    A_7 = odeint(construir_modelo(ahorro_mensual, gI, R_7, factor_ahorro), A0, t).flatten()
-    
-    return t, A_3, A_7, I0, factor_ahorro, ahorro_mensual, gasto
+    indices = np.empty(n_puntos, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    elegido = 0
+    for i, (inicio, fin) in enumerate(zip(bordes[:-1].tolist(), bordes[1:].tolist())):
+        xe, ye = x[elegido], y[elegido]
+        areas = np.abs((xe - x_prom[i + 1]) * (y[inicio:fin] - ye) - (xe - x[inicio:fin]) * (y_prom[i + 1] - ye))
+        elegido = inicio + int(areas.argmax())
+        indices[i + 1] = elegido
+    return indices
 
-def calcular_proyecciones(n_clicks, salario, meses, tasa_crecimiento, file_data, variables_ahorro):
-    if not n_clicks or not salario or not meses:
-        return None
+def _traza_serie(x, y, rango=None, max_puntos=MAX_PUNTOS_SERIE, **kwargs):
+    """Scatter de una serie mensual reducido a max_puntos dentro de rango (x0, x1).
+    
+    Con rango solo se envían los puntos visibles (más uno a cada lado para que
+    la línea llegue a los bordes), así al hacer zoom la resolución aumenta.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if rango is not None:
+        desde = max(int(np.searchsorted(x, rango[0], side='left')) - 1, 0)
+        hasta = int(np.searchsorted(x, rango[1], side='right')) + 1
+        x, y = x[desde:hasta], y[desde:hasta]
     
-    try:
-        salario = float(salario)
-        meses = int(meses)
-        tasa_crecimiento = float(tasa_crecimiento) if tasa_crecimiento else 0.0
-        
-        vars_ahorro = {
-            'expectativas_ingresos': variables_ahorro.get('expectativas_ingresos', 1.0),
-            'tasa_interes': variables_ahorro.get('tasa_interes', 1.0),
-            'inflacion': variables_ahorro.get('inflacion', 1.0),
-            'preferencias_temporales': variables_ahorro.get('preferencias_temporales', 1.0),
-            'educacion_financiera': variables_ahorro.get('educacion_financiera', 1.0),
-            'riesgo_desempleo': variables_ahorro.get('riesgo_desempleo', 1.0),
-            'situacion_familiar': variables_ahorro.get('situacion_familiar', 1.0),
-            'gastos_salud': variables_ahorro.get('gastos_salud', 1.0),
-            'estabilidad_laboral': variables_ahorro.get('estabilidad_laboral', 1.0)
-        }
-        
-        gasto = leer_gastos(file_data)
-        t, A_3, A_7, I0, factor_ahorro, ahorro_mensual, gasto = resolver_EDO(salario, gasto, tasa_crecimiento, meses, vars_ahorro)
-        
-        if ahorro_mensual < 0:
-            A_3[-1] = -1
-            A_7[-1] = -1
-        
-        saldo_simple = ahorro_mensual * meses
-        saldo_3 = ahorro_mensual * (((1 + R_3)**meses - 1) / R_3)
-        saldo_7 = ahorro_mensual * (((1 + R_7)**meses - 1) / R_7)
+    traza = go.Scattergl if len(x) > UMBRAL_WEBGL else go.Scatter
+    indices = lttb(x, y, max_puntos)
+    return traza(x=x[indices], y=y[indices], mode="lines", **kwargs)
 
-        fig1 = go.Figure([
-            go.Bar(
-                x=["0% Simple", "3% Simple", "7% Simple"], 
-                y=[saldo_simple, saldo_3, saldo_7],
-                name="Fórmula Simple",
-                marker_color=["#1100AD", "#1100AD", "#1100AD"]
-            ),
-            go.Bar(
-                x=["3% EDO", "7% EDO"], 
-                y=[A_3[-1], A_7[-1]],
-                name="Modelo EDO",
-                marker_color=["#BB0A37", "#BB0A37"]
-            )
-        ])
-        fig1.update_layout(
-            title="Comparación de Métodos de Cálculo",
-            barmode='group',
-            template="plotly_white"
+def _trazas_comparacion(resultados):
+    res = resultados["resultados"]
+    return [
+        go.Bar(
+            x=["0% Simple", "3% Simple", "7% Simple"], 
+            y=[res["simple_0"], res["simple_3"], res["simple_7"]],
+            name="Fórmula Simple",
+            marker_color=["#1100AD", "#1100AD", "#1100AD"]
+        ),
+        go.Bar(
+            x=["3% EDO", "7% EDO"], 
+            y=[res["edo_3"], res["edo_7"]],
+            name="Modelo EDO",
+            marker_color=["#BB0A37", "#BB0A37"]
         )
+    ]
 
-        fig2 = go.Figure()
-        fig2.add_trace(go.Scatter(
-            x=t, y=ahorro_mensual * t,
+@medir("figura", grafico="comparacion")
+def construir_grafico_comparacion(resultados=None):
+    """Gráfico de barras con los montos finales de cada método.
+    
+    Sin resultados devuelve solo el layout, para completarlo con parche_datos.
+    """
+    fig1 = go.Figure(_trazas_comparacion(resultados) if resultados else [])
+    fig1.update_layout(
+        title="Comparación de Métodos de Cálculo",
+        barmode='group',
+        template="plotly_white"
+    )
+    return fig1
+
+def _trazas_evolucion(resultados, rango=None):
+    ahorro_mensual = resultados["datos_entrada"]["ahorro_mensual"]
+    t = np.asarray(resultados["series"]["t"])
+    A_3 = resultados["series"]["A_3"]
+    A_7 = resultados["series"]["A_7"]
+    
+    return [
+        _traza_serie(
+            t, serie_uniforme(ahorro_mensual, 0, t), rango,
             name="0% Simple",
             line=dict(dash="dot", color="#636EFA")
-        ))
-        fig2.add_trace(go.Scatter(
-            x=t, y=ahorro_mensual * (((1 + R_3)**t - 1) / R_3),
+        ),
+        _traza_serie(
+            t, serie_uniforme(ahorro_mensual, R_3, t), rango,
             name="3% Simple",
             line=dict(dash="dot", color="#EF553B")
-        ))
-        fig2.add_trace(go.Scatter(
-            x=t, y=ahorro_mensual * (((1 + R_7)**t - 1) / R_7),
+        ),
+        _traza_serie(
+            t, serie_uniforme(ahorro_mensual, R_7, t), rango,
             name="7% Simple",
             line=dict(dash="dot", color="#00CC96")
-        ))
-        fig2.add_trace(go.Scatter(
-            x=t, y=A_3,
+        ),
+        _traza_serie(
+            t, A_3, rango,
             name="3% EDO",
             line=dict(color="#AB63FA")
-        ))
-        fig2.add_trace(go.Scatter(
-            x=t, y=A_7,
+        ),
+        _traza_serie(
+            t, A_7, rango,
             name="7% EDO",
             line=dict(color="#FFA15A")
-        ))
-        fig2.update_layout(
-            title="Evolución Temporal del Ahorro",
-            xaxis_title="Meses",
-            yaxis_title="Monto Acumulado (Bs)",
-            template="plotly_white"
         )
+    ]
 
-        fig3 = make_subplots(
-            rows=1, cols=2,
-            subplot_titles=("Modelo con 3% de interés", "Modelo con 7% de interés")
-        )
-        fig3.add_trace(go.Scatter(
-            x=t, y=A_3,
+@medir("figura", grafico="evolucion")
+def construir_grafico_evolucion(resultados=None, rango=None):
+    """Evolución temporal de las fórmulas simples y los modelos EDO.
+    
+    rango (x0, x1) limita las series a los meses visibles tras un zoom. Sin
+    resultados devuelve solo el layout.
+    """
+    fig2 = go.Figure(_trazas_evolucion(resultados, rango) if resultados else [])
+    fig2.update_layout(
+        title="Evolución Temporal del Ahorro",
+        xaxis_title="Meses",
+        yaxis_title="Monto Acumulado (Bs)",
+        template="plotly_white",
+        uirevision="evolucion"
+    )
+    if rango is not None:
+        fig2.update_xaxes(range=list(rango))
+    return fig2
+
+def _trazas_detalle(resultados, rango_3=None, rango_7=None):
+    """Trazas del gráfico de detalle con el subgráfico (columna) de cada una"""
+    ahorro_mensual = resultados["datos_entrada"]["ahorro_mensual"]
+    t = np.asarray(resultados["series"]["t"])
+    A_3 = resultados["series"]["A_3"]
+    A_7 = resultados["series"]["A_7"]
+    
+    return [
+        (_traza_serie(
+            t, A_3, rango_3,
             name="EDO 3%",
             line=dict(color="#AB63FA")
-        ), row=1, col=1)
-        fig3.add_trace(go.Scatter(
-            x=t, y=ahorro_mensual * (((1 + R_3)**t - 1) / R_3),
+        ), 1),
+        (_traza_serie(
+            t, serie_uniforme(ahorro_mensual, R_3, t), rango_3,
             name="Simple 3%",
             line=dict(dash='dot', color="#EF553B")
-        ), row=1, col=1)
-        fig3.add_trace(go.Scatter(
-            x=t, y=A_7,
+        ), 1),
+        (_traza_serie(
+            t, A_7, rango_7,
             name="EDO 7%",
             line=dict(color="#FFA15A")
-        ), row=1, col=2)
-        fig3.add_trace(go.Scatter(
-            x=t, y=ahorro_mensual * (((1 + R_7)**t - 1) / R_7),
+        ), 2),
+        (_traza_serie(
+            t, serie_uniforme(ahorro_mensual, R_7, t), rango_7,
             name="Simple 7%",
             line=dict(dash='dot', color="#00CC96")
+        ), 2)
+    ]
+
+@medir("figura", grafico="detalle")
+def construir_grafico_detalle(resultados=None, rango_3=None, rango_7=None):
+    """Comparación detallada de cada modelo EDO contra su fórmula simple.
+    
+    rango_3 y rango_7 (x0, x1) limitan cada subgráfico a los meses visibles.
+    Sin resultados devuelve solo el layout.
+    """
+    fig3 = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=("Modelo con 3% de interés", "Modelo con 7% de interés")
+    )
+    if resultados:
+        for traza, columna in _trazas_detalle(resultados, rango_3, rango_7):
+            fig3.add_trace(traza, row=1, col=columna)
+    fig3.update_layout(
+        title_text="Comparación Detallada: Modelo EDO vs Fórmula Simple",
+        template="plotly_white",
+        showlegend=False,
+        uirevision="edos"
+    )
+    fig3.update_xaxes(title_text="Meses")
+    fig3.update_yaxes(title_text="Monto Acumulado (Bs)")
+    if rango_3 is not None:
+        fig3.update_xaxes(range=list(rango_3), row=1, col=1)
+    if rango_7 is not None:
+        fig3.update_xaxes(range=list(rango_7), row=1, col=2)
+    return fig3
+
+def parche_datos(figura, revision, ejes=("xaxis",), solo_y=False):
+    """dash.Patch que reemplaza solo las trazas de una figura ya dibujada.
+    
+    El layout (plantilla, títulos, ejes) queda en el navegador. Con solo_y se
+    envían únicamente los valores y, para cuando el navegador ya tiene las
+    mismas trazas con los mismos x. Los ejes de ejes vuelven a autorange y
+    uirevision pasa a revision, así un zoom anterior no recorta las series nuevas.
+    """
+    parche = Patch()
+    if solo_y:
+        for i, traza in enumerate(figura.data):
+            parche["data"][i]["y"] = traza.y
+    else:
+        parche["data"] = [traza.to_plotly_json() for traza in figura.data]
+    for eje in ejes:
+        parche["layout"][eje]["autorange"] = True
+    parche["layout"]["uirevision"] = revision
+    return parche
+
+@medir("figura", grafico="sensibilidad")
+def construir_grafico_sensibilidad(resultados):
+    """Gráfico de tornado del saldo EDO 7% y, si hay, índices de Sobol por variable"""
+    analisis = resultados["sensibilidad"]
+    tornado = analisis["tornado"]
+    filas = tornado["variables"][::-1]
+    base = tornado["base"]
+    etiquetas = [fila["etiqueta"] for fila in filas]
+    
+    sobol = analisis.get("sobol")
+    fig = make_subplots(
+        rows=1, cols=2 if sobol else 1,
+        subplot_titles=("Tornado: saldo EDO 7% con cada variable en sus extremos",
+                        "Índices de Sobol") if sobol else None,
+        horizontal_spacing=0.25
+    )
+    fig.add_trace(go.Bar(
+        y=etiquetas, x=[fila["minimo"] - base for fila in filas], base=base,
+        orientation='h', name="Valor mínimo", marker_color="#00CC96"
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        y=etiquetas, x=[fila["maximo"] - base for fila in filas], base=base,
+        orientation='h', name="Valor máximo", marker_color="#EF553B"
+    ), row=1, col=1)
+    fig.add_vline(x=base, line_dash="dot", line_color="#636EFA", row=1, col=1)
+    
+    if sobol:
+        filas_sobol = sobol["variables"][::-1]
+        fig.add_trace(go.Bar(
+            y=[fila["etiqueta"] for fila in filas_sobol], x=[fila["total"] for fila in filas_sobol],
+            orientation='h', name="Total", marker_color="#FFA15A"
         ), row=1, col=2)
-        fig3.update_layout(
-            title_text="Comparación Detallada: Modelo EDO vs Fórmula Simple",
-            template="plotly_white",
-            showlegend=False
-        )
-        fig3.update_xaxes(title_text="Meses")
-        fig3.update_yaxes(title_text="Monto Acumulado (Bs)")
+        fig.add_trace(go.Bar(
+            y=[fila["etiqueta"] for fila in filas_sobol], x=[fila["primer_orden"] for fila in filas_sobol],
+            orientation='h', name="Primer orden", marker_color="#AB63FA"
+        ), row=1, col=2)
+    
+    fig.update_layout(
+        title_text="Análisis de Sensibilidad de las Variables de Ahorro",
+        barmode='overlay',
+        template="plotly_white",
+        height=500
+    )
+    fig.update_xaxes(title_text="Monto Acumulado (Bs)", row=1, col=1)
+    return fig
 
-        return {
-            "datos_entrada": {
-                "salario": salario,
-                "meses": meses,
-                "tasa_crecimiento": tasa_crecimiento,
-                "gasto": gasto,
-                "ahorro_mensual": ahorro_mensual,
-                "ingreso_neto": I0,
-                "factor_ahorro": factor_ahorro,
-                "variables_ahorro": vars_ahorro
-            },
-            "resultados": {
-                "simple_0": saldo_simple,
-                "simple_3": saldo_3,
-                "simple_7": saldo_7,
-                "edo_3": A_3[-1],
-                "edo_7": A_7[-1]
-            },
-            "graficos": {
-                "comparacion": fig1,
-                "evolucion": fig2,
-                "detalle": fig3
-            }
-        }
-    except Exception as e:
-        print(f"Error calculando proyecciones: {str(e)}")
-        return None
\ No newline at end of file
+@medir("figura", grafico="escenarios")
+def construir_grafico_escenarios(escenarios):
+    """Saldos finales EDO y evolución al 7% de cada escenario guardado"""
+    nombres = [e['nombre'] for e in escenarios]
+    
+    fig = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=("Saldo final por escenario", "Evolución EDO 7%")
+    )
+    fig.add_trace(go.Bar(
+        x=nombres, y=[e['resultado']['edo_3'] for e in escenarios],
+        name="EDO 3%", marker_color="#AB63FA"
+    ), row=1, col=1)
+    fig.add_trace(go.Bar(
+        x=nombres, y=[e['resultado']['edo_7'] for e in escenarios],
+        name="EDO 7%", marker_color="#FFA15A"
+    ), row=1, col=1)
+    for escenario in escenarios:
+        serie = escenario['resultado']['serie_7']
+        fig.add_trace(_traza_serie(
+            np.arange(len(serie)), serie,
+            name=escenario['nombre']
+        ), row=1, col=2)
+    
+    fig.update_layout(
+        title_text="Comparación de Escenarios",
+        barmode='group',
+        template="plotly_white",
+        height=500
+    )
+    fig.update_xaxes(title_text="Meses", row=1, col=2)
+    fig.update_yaxes(title_text="Monto Acumulado (Bs)")
+    return fig
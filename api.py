@@ -0,0 +1,218 @@
+import json
+import math
+import os
+
+from flask import Response, jsonify, request, stream_with_context
+
+# Lotes con más perfiles que esto se responden como NDJSON por bloques
+UMBRAL_NDJSON = 1000
+FILAS_POR_BLOQUE = 5000
+MAX_PERFILES = 1_000_000
+MAX_TRAYECTORIAS = 1_000_000
+# Procesos por simulación Monte Carlo; con 1 corre en el worker que atiende la solicitud
+WORKERS_MONTECARLO = int(os.environ.get('MONTECARLO_WORKERS', 1))
+
+class ErrorEntrada(ValueError):
+    pass
+
+def _leer_json():
+    datos = request.get_json(silent=True)
+    if datos is None:
+        raise ErrorEntrada("El cuerpo debe ser JSON")
+    return datos
+
+def _numero(datos, clave, defecto=None):
+    valor = datos.get(clave, defecto)
+    if valor is None:
+        raise ErrorEntrada(f"Falta el campo '{clave}'")
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        raise ErrorEntrada(f"El campo '{clave}' debe ser numérico")
+    if not math.isfinite(numero):
+        raise ErrorEntrada(f"El campo '{clave}' debe ser un número finito")
+    return numero
+
+def _lista_numeros(datos, clave, nulos=False):
+    """Lista de números finitos del campo clave; con nulos acepta null (dato faltante)"""
+    valores = datos.get(clave)
+    if not isinstance(valores, list):
+        raise ErrorEntrada(f"El campo '{clave}' debe ser una lista")
+    return [None if nulos and valor is None else _numero({clave: valor}, clave) for valor in valores]
+
+def _variables(datos):
+    """variables_ahorro como dict de números finitos"""
+    variables = datos.get('variables_ahorro') or {}
+    if not isinstance(variables, dict):
+        raise ErrorEntrada("variables_ahorro debe ser un objeto")
+    return {nombre: _numero(variables, nombre) for nombre in variables}
+
+def _meses(datos, defecto=120):
+    """Horizonte en meses, entre 1 y MESES_MAX_OBJETIVO"""
+    from nucleo import MESES_MAX_OBJETIVO
+
+    meses = int(_numero(datos, 'meses', defecto))
+    if not 1 <= meses <= MESES_MAX_OBJETIVO:
+        raise ErrorEntrada(f"meses debe estar entre 1 y {MESES_MAX_OBJETIVO}")
+    return meses
+
+def _validar_perfiles(df):
+    """Rechaza perfiles sin salario positivo, con valores infinitos o con plazos fuera de rango"""
+    import numpy as np
+    from nucleo import MESES_MAX_OBJETIVO
+
+    numericas = df.select_dtypes('number')
+    infinitos = np.isinf(numericas.to_numpy(dtype=float)).any(axis=1)
+    if infinitos.any():
+        raise ErrorEntrada(f"El perfil {int(np.argmax(infinitos))} tiene valores infinitos")
+    salario = df['salario']
+    invalidos = salario.isna() | (salario <= 0)
+    if invalidos.any():
+        raise ErrorEntrada(f"El perfil {int(np.argmax(invalidos.to_numpy()))} debe tener un salario positivo")
+    if 'meses' in df.columns:
+        meses = df['meses']
+        invalidos = meses.notna() & ((meses < 1) | (meses > MESES_MAX_OBJETIVO))
+        if invalidos.any():
+            raise ErrorEntrada(f"El perfil {int(np.argmax(invalidos.to_numpy()))} debe tener meses "
+                               f"entre 1 y {MESES_MAX_OBJETIVO}")
+
+def simular_uno(datos):
+    """Proyección de un perfil con el núcleo numérico, sin componentes ni figuras de Dash.
+
+    datos: salario, meses, tasa_crecimiento, gasto o categorias ({montos, inflacion}),
+    variables_ahorro y opcionalmente solver, series, inflacion_por_categoria,
+    sensibilidad y tasas_barrido.
+    """
+    from nucleo import calcular_proyecciones
+
+    if not isinstance(datos, dict):
+        raise ErrorEntrada("El cuerpo debe ser un objeto JSON")
+    salario = _numero(datos, 'salario')
+    meses = _meses(datos)
+    if salario <= 0:
+        raise ErrorEntrada("salario debe ser positivo")
+
+    file_data = {"gasto_total": _numero(datos, 'gasto', 0)}
+    if datos.get('categorias'):
+        categorias = datos['categorias']
+        if not isinstance(categorias, dict):
+            raise ErrorEntrada("categorias debe ser un objeto con montos e inflacion")
+        montos = _lista_numeros(categorias, 'montos')
+        inflacion = _lista_numeros(categorias, 'inflacion', nulos=True) if categorias.get('inflacion') is not None \
+            else [None] * len(montos)
+        if len(inflacion) != len(montos):
+            raise ErrorEntrada("categorias.montos y categorias.inflacion deben tener el mismo largo")
+        file_data = {"gasto_total": sum(montos), "categorias": {"montos": montos, "inflacion": inflacion}}
+
+    solver = datos.get('solver', 'analytic')
+    if solver not in ('analytic', 'odeint'):
+        raise ErrorEntrada(f"Solver desconocido: {solver}")
+
+    resultado = calcular_proyecciones(
+        1, salario, meses, _numero(datos, 'tasa_crecimiento', 0), file_data,
+        _variables(datos), solver=solver,
+        tasas_barrido=datos.get('tasas_barrido'),
+        inflacion_por_categoria=bool(datos.get('inflacion_por_categoria', False)),
+        sensibilidad=bool(datos.get('sensibilidad', False))
+    )
+    if resultado is None:
+        raise ErrorEntrada("No se pudo calcular la proyección con esos datos")
+    if not datos.get('series', False):
+        resultado = {k: v for k, v in resultado.items() if k != 'series'}
+    return resultado
+
+def simular_estocastico(datos):
+    """Percentiles 5, 50 y 95 del saldo por mes con montecarlo.simular_montecarlo.
+
+    datos: salario, meses, gasto, tasa_crecimiento, variables_ahorro y
+    opcionalmente n_trayectorias (hasta MAX_TRAYECTORIAS) y semilla.
+    """
+    from montecarlo import simular_montecarlo
+
+    salario = _numero(datos, 'salario')
+    if salario <= 0:
+        raise ErrorEntrada("salario debe ser positivo")
+    n_trayectorias = int(_numero(datos, 'n_trayectorias', 10000))
+    if not 1 <= n_trayectorias <= MAX_TRAYECTORIAS:
+        raise ErrorEntrada(f"n_trayectorias debe estar entre 1 y {MAX_TRAYECTORIAS}")
+    semilla = datos.get('semilla')
+    if semilla is not None and (not isinstance(semilla, int) or isinstance(semilla, bool) or semilla < 0):
+        raise ErrorEntrada("semilla debe ser un entero no negativo")
+
+    resultado = simular_montecarlo(
+        salario, _numero(datos, 'gasto', 0), _numero(datos, 'tasa_crecimiento', 0), _meses(datos),
+        _variables(datos), n_trayectorias=n_trayectorias, workers=WORKERS_MONTECARLO, semilla=semilla
+    )
+    return {clave: valor.tolist() if hasattr(valor, 'tolist') else valor for clave, valor in resultado.items()}
+
+def _bloques_lote(df, meses):
+    """Resultados del lote por bloques de FILAS_POR_BLOQUE filas"""
+    from nucleo import simular_perfiles
+
+    for inicio in range(0, len(df), FILAS_POR_BLOQUE):
+        bloque = df.iloc[inicio:inicio + FILAS_POR_BLOQUE]
+        resumen = simular_perfiles(bloque, meses=meses)
+        resultado = bloque.join(resumen, rsuffix='_resultado')
+        # Los campos opcionales que faltaban salen como null y no como NaN (JSON inválido)
+        yield resultado.astype(object).where(resultado.notna(), None)
+
+def registrar_api(server):
+    """Agrega las rutas JSON de simulación al servidor Flask de Dash.
+
+    POST /api/simular        un perfil (ver simular_uno)
+    POST /api/simular/lote   {"perfiles": [...], "meses": 120} con salario, gasto,
+                             tasa_crecimiento, meses y variables de ahorro por perfil.
+                             Con más de UMBRAL_NDJSON perfiles, o con
+                             Accept: application/x-ndjson, la respuesta es NDJSON.
+    POST /api/montecarlo     percentiles del saldo por mes (ver simular_estocastico)
+    """
+    @server.errorhandler(ErrorEntrada)
+    def error_entrada(e):
+        return jsonify({"error": str(e)}), 400
+
+    @server.route('/api/simular', methods=['POST'])
+    def api_simular():
+        return jsonify(simular_uno(_leer_json()))
+
+    @server.route('/api/montecarlo', methods=['POST'])
+    def api_montecarlo():
+        datos = _leer_json()
+        if not isinstance(datos, dict):
+            raise ErrorEntrada("El cuerpo debe ser un objeto JSON")
+        return jsonify(simular_estocastico(datos))
+
+    @server.route('/api/simular/lote', methods=['POST'])
+    def api_simular_lote():
+        import pandas as pd
+
+        datos = _leer_json()
+        perfiles = datos.get('perfiles') if isinstance(datos, dict) else datos
+        if not isinstance(perfiles, list) or not perfiles:
+            raise ErrorEntrada("Se espera una lista no vacía en 'perfiles'")
+        if len(perfiles) > MAX_PERFILES:
+            raise ErrorEntrada(f"El lote admite hasta {MAX_PERFILES} perfiles")
+        meses = _meses(datos) if isinstance(datos, dict) else 120
+
+        try:
+            df = pd.DataFrame.from_records(perfiles)
+        except (TypeError, ValueError) as e:
+            raise ErrorEntrada(f"Perfiles inválidos: {str(e)}")
+        if 'salario' not in df.columns:
+            raise ErrorEntrada("Cada perfil debe tener 'salario'")
+        numericas = df.columns.drop(['id', 'nombre'], errors='ignore')
+        try:
+            df[numericas] = df[numericas].apply(pd.to_numeric)
+        except (TypeError, ValueError) as e:
+            raise ErrorEntrada(f"Los campos de los perfiles deben ser numéricos: {str(e)}")
+        _validar_perfiles(df)
+
+        ndjson = len(df) > UMBRAL_NDJSON or 'application/x-ndjson' in request.headers.get('Accept', '')
+        if not ndjson:
+            return jsonify({"resultados": next(_bloques_lote(df, meses)).to_dict('records')})
+
+        def generar():
+            for bloque in _bloques_lote(df, meses):
+                for registro in bloque.to_dict('records'):
+                    yield json.dumps(registro) + '\n'
+
+        return Response(stream_with_context(generar()), mimetype='application/x-ndjson')
@@ -0,0 +1,43 @@
+// Modo en vivo: agrupa los cambios de los datos y descarta respuestas superadas.
+// Cada cambio y cada clic en "Calcular Proyecciones" numeran una solicitud con el
+// mismo contador; en vivo solo llega al servidor la que sobrevive a la pausa de
+// config-en-vivo.espera_ms, y solo se aplica la respuesta de la última enviada.
+(function () {
+    var ultima = 0;
+
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.simulador = Object.assign({}, window.dash_clientside.simulador, {
+        programar_en_vivo: function (en_vivo) {
+            var config = arguments[arguments.length - 1] || {};
+            var sinCambios = window.dash_clientside.no_update;
+            // Cualquier cambio invalida las solicitudes que todavía esperan
+            var secuencia = ++ultima;
+            if (!en_vivo) {
+                return sinCambios;
+            }
+            return new Promise(function (resolver) {
+                setTimeout(function () {
+                    resolver(secuencia === ultima ? secuencia : sinCambios);
+                }, config.espera_ms || 0);
+            });
+        },
+
+        numerar_calculo: function (n_clicks) {
+            // El clic también invalida una solicitud en vivo que todavía espera
+            return n_clicks ? ++ultima : window.dash_clientside.no_update;
+        },
+
+        aplicar_resultados: function (respuesta, solicitud_en_vivo, solicitud_calculo) {
+            var sinCambios = window.dash_clientside.no_update;
+            if (!respuesta) {
+                return [sinCambios, sinCambios];
+            }
+            // Solo se aplica la respuesta de la última solicitud enviada, sea en vivo o del botón
+            var vigente = Math.max(solicitud_en_vivo || 0, solicitud_calculo || 0);
+            if (respuesta.secuencia !== vigente) {
+                return [sinCambios, sinCambios];
+            }
+            return [respuesta.resultados, false];
+        }
+    });
+})();
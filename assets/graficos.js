@@ -0,0 +1,13 @@
+// Muestra el gráfico persistente de la pestaña activa. Los gráficos de
+// Comparación, Evolución y Detalle EDOs se crean una vez y quedan montados;
+// solo se ocultan, así los parches del servidor siempre tienen dónde aplicarse.
+(function () {
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.simulador = Object.assign({}, window.dash_clientside.simulador, {
+        mostrar_graficos: function (pestana, resultados, graficos) {
+            return Object.keys(graficos || {}).map(function (tab) {
+                return {display: tab === pestana && resultados ? "block" : "none"};
+            });
+        }
+    });
+})();
@@ -0,0 +1,89 @@
+// Vista previa de la fórmula simple calculada en el navegador.
+// Usa las mismas expresiones que nucleo.serie_uniforme; las constantes llegan
+// desde Python en el store "constantes-simple" para no duplicarlas.
+(function () {
+    window.dash_clientside = window.dash_clientside || {};
+    window.dash_clientside.simulador = Object.assign({}, window.dash_clientside.simulador, {
+        vista_previa: function (salario, meses, file_data, constantes) {
+            var sinCambios = window.dash_clientside.no_update;
+            salario = parseFloat(salario);
+            meses = parseInt(meses, 10);
+            if (!constantes || !(salario > 0) || !(meses > 0)) {
+                return ["-", "-", "-", sinCambios];
+            }
+
+            var ahorro = salario * (1 - constantes.afp) - gastoTotal(file_data);
+            var tasas = [0, constantes.r_3, constantes.r_7];
+
+            // La fórmula es cerrada: alcanza con muestrear la curva en MAX_PUNTOS meses
+            var paso = Math.max(1, Math.ceil(meses / constantes.max_puntos));
+            var t = [];
+            for (var m = 0; m < meses; m += paso) {
+                t.push(m);
+            }
+            t.push(meses);
+
+            var nombres = ["0% Simple", "3% Simple", "7% Simple"];
+            var colores = ["#636EFA", "#EF553B", "#00CC96"];
+            var finales = [];
+            var trazas = tasas.map(function (r, i) {
+                finales.push(formatear(serieUniforme(ahorro, r, meses)));
+                return {
+                    type: "scatter",
+                    mode: "lines",
+                    x: t,
+                    y: t.map(function (mes) { return serieUniforme(ahorro, r, mes); }),
+                    name: nombres[i],
+                    line: {dash: "dot", color: colores[i]}
+                };
+            });
+
+            var figura = {
+                data: trazas,
+                layout: {
+                    height: 260,
+                    margin: {l: 60, r: 20, t: 20, b: 40},
+                    xaxis: {title: {text: "Meses"}, gridcolor: "#EBF0F8"},
+                    yaxis: {title: {text: "Bs."}, gridcolor: "#EBF0F8"},
+                    legend: {orientation: "h"},
+                    paper_bgcolor: "white",
+                    plot_bgcolor: "white"
+                }
+            };
+            return finales.concat([figura]);
+        }
+    });
+
+    function serieUniforme(pago, r, t) {
+        if (r === 0) {
+            return pago * t;
+        }
+        return pago * Math.expm1(t * Math.log1p(r)) / r;
+    }
+
+    function gastoTotal(file_data) {
+        // Mismo criterio que nucleo.leer_gastos: resumen de ingesta o JSON orient='split'
+        if (!file_data) {
+            return 0;
+        }
+        var gasto = 0;
+        if (typeof file_data === "object") {
+            gasto = parseFloat(file_data.gasto_total) || 0;
+        } else {
+            try {
+                var df = JSON.parse(file_data);
+                var columna = df.columns.indexOf("Gasto mensual estimado");
+                if (columna >= 0) {
+                    df.data.forEach(function (fila) { gasto += parseFloat(fila[columna]) || 0; });
+                }
+            } catch (e) {
+                return 0;
+            }
+        }
+        return gasto >= 0 ? gasto : 0;
+    }
+
+    function formatear(valor) {
+        return "Bs. " + valor.toLocaleString("en-US", {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    }
+})();
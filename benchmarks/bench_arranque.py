@@ -0,0 +1,55 @@
+"""Tiempo de importación al arrancar un worker.
+
+Uso: python -m benchmarks.bench_arranque [modulo] [--limite-ms N] [--top N]
+
+Importa el módulo (por defecto panel) en un intérprete nuevo con -X importtime,
+muestra los módulos más costosos y verifica que no se carguen dependencias que
+solo hacen falta en callbacks (reportlab, matplotlib, scipy, plotly, pandas).
+Sale con código 1 si se carga alguna o si el total supera --limite-ms.
+"""
+import argparse
+import subprocess
+import sys
+
+# Solo deben cargarse al usar la función que las necesita
+DIFERIDAS = ('reportlab', 'matplotlib', 'scipy', 'plotly.graph_objects', 'pandas')
+
+def medir(modulo='panel'):
+    """Devuelve ({módulo: microsegundos acumulados}, total_us, diferidas_cargadas)"""
+    codigo = (
+        f"import sys; import {modulo}; "
+        f"print(','.join(m for m in {DIFERIDAS!r} if m in sys.modules))"
+    )
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        capture_output=True, text=True, check=True
+    )
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, _, acumulado, nombre = (parte.strip() for parte in linea.split('|', 1)[0].split(':', 1) + linea.split('|')[1:])
+        tiempos[nombre] = int(acumulado)
+    cargadas = [m for m in proceso.stdout.strip().split(',') if m]
+    return tiempos, tiempos.get(modulo, 0), cargadas
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('modulo', nargs='?', default='panel')
+    parser.add_argument('--limite-ms', type=float, default=None)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    tiempos, total, cargadas = medir(args.modulo)
+    for nombre, us in sorted(tiempos.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"{us / 1000:9.1f} ms  {nombre}")
+    print(f"total {args.modulo}: {total / 1000:.1f} ms")
+
+    fallo = False
+    if cargadas:
+        print(f"dependencias diferidas cargadas al importar: {', '.join(cargadas)}")
+        fallo = True
+    if args.limite_ms is not None and total / 1000 > args.limite_ms:
+        print(f"el arranque supera el límite de {args.limite_ms} ms")
+        fallo = True
+    sys.exit(1 if fallo else 0)
@@ -0,0 +1,63 @@
+"""Tiempo de CPU por reporte PDF.
+
+Uso: python -m benchmarks.bench_reporte [repeticiones]
+
+Mide generar_reporte_completo con los gráficos ya renderizados (solo el armado
+del PDF), el reporte completo con los gráficos en secuencia y el tiempo real de
+renderizar los gráficos en secuencia frente al pool de procesos de un trabajo
+(que se levanta en frío, como en cada reporte en segundo plano).
+"""
+import os
+import sys
+import time
+from io import BytesIO
+
+import algoritmo
+import generarReporte
+
+def _tiempo_cpu(funcion, repeticiones):
+    funcion()
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.process_time() - inicio) / repeticiones
+
+def _tiempo_real(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+def medir(repeticiones=10, meses=120):
+    resultados = algoritmo.calcular_proyecciones(1, 2750, meses, 2, None, {})
+    pngs = {k: v.getvalue() if v else None
+            for k, v in generarReporte.renderizar_graficos(resultados, workers=1).items()}
+
+    renderizar_original = generarReporte.renderizar_graficos
+    generarReporte.renderizar_graficos = lambda res, workers=None: {
+        k: BytesIO(v) if v else None for k, v in pngs.items()
+    }
+    try:
+        solo_pdf = _tiempo_cpu(lambda: generarReporte.generar_reporte_completo(resultados), repeticiones)
+    finally:
+        generarReporte.renderizar_graficos = renderizar_original
+
+    completo = _tiempo_cpu(
+        lambda: generarReporte.generar_reporte_completo(resultados),
+        max(1, repeticiones // 2)
+    ) if generarReporte.REPORTE_WORKERS == 1 else None
+
+    workers = max(2, min(len(generarReporte.GRAFICOS_REPORTE), os.cpu_count() or 1))
+    secuencia = _tiempo_real(lambda: generarReporte.renderizar_graficos(resultados, workers=1), 3)
+    pool = _tiempo_real(lambda: generarReporte.renderizar_graficos(resultados, workers=workers), 3)
+
+    tamano = len(generarReporte.generar_reporte_completo(resultados).getvalue())
+    return {"cpu_armado_pdf_s": solo_pdf, "cpu_reporte_completo_s": completo, "bytes_pdf": tamano,
+            "real_graficos_secuencia_s": secuencia, f"real_graficos_pool_{workers}_s": pool}
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for nombre, valor in medir(repeticiones).items():
+        print(f"{nombre}: {valor}")
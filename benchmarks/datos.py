@@ -0,0 +1,66 @@
+"""Datos sintéticos reproducibles para los benchmarks.
+
+Todas las funciones usan una semilla fija, así dos corridas miden exactamente
+la misma entrada.
+"""
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+
+SEMILLA = 20240601
+
+CATEGORIAS = [
+    "Vivienda", "Servicios", "Alimentación", "Transporte", "Educación",
+    "Salud", "Entretenimiento", "Vestimenta", "Comunicación", "Otros gastos"
+]
+
+VARIABLES_AHORRO = {
+    'expectativas_ingresos': 0.95,
+    'tasa_interes': 1.0,
+    'inflacion': 1.05,
+    'preferencias_temporales': 1.1,
+    'educacion_financiera': 0.95,
+    'riesgo_desempleo': 1.0,
+    'situacion_familiar': 1.1,
+    'gastos_salud': 1.0,
+    'estabilidad_laboral': 0.95
+}
+
+def planilla_gastos(filas, semilla=SEMILLA):
+    """DataFrame con el formato de DatosGasto.xlsx y filas categorías de gasto"""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'Caterioria de gasto': [f"{CATEGORIAS[i % len(CATEGORIAS)]} {i}" for i in range(filas)],
+        'Gasto mensual estimado': rng.uniform(5, 500, filas).round(2),
+        'Nota/Detalle': [''] * filas,
+        'Mes': ['enero'] * filas
+    })
+
+def archivo_gastos(filas, formato='excel', semilla=SEMILLA):
+    """Bytes del archivo de gastos en 'excel' o 'csv'"""
+    df = planilla_gastos(filas, semilla)
+    buffer = io.BytesIO()
+    if formato == 'excel':
+        df.to_excel(buffer, index=False)
+    elif formato == 'csv':
+        df.to_csv(buffer, index=False)
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+    return buffer.getvalue()
+
+def contenido_upload(datos):
+    """Contenido base64 como lo entrega dcc.Upload"""
+    return 'data:application/octet-stream;base64,' + base64.b64encode(datos).decode()
+
+def json_heredado(filas, semilla=SEMILLA):
+    """store-file-data en el formato JSON anterior (DataFrame orient='split')"""
+    return planilla_gastos(filas, semilla).to_json(orient='split')
+
+def resultados_simulacion(meses=120):
+    """Resultados de calcular_proyecciones con sensibilidad para alimentar gráficos y reporte"""
+    from nucleo import _calcular_proyecciones
+    return _calcular_proyecciones.__wrapped__(
+        8000, meses, 3, {"gasto_total": 1900}, VARIABLES_AHORRO, sensibilidad=True, n_sobol=1024
+    )
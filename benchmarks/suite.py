@@ -0,0 +1,262 @@
+"""Suite de benchmarks del motor, la ingesta, los gráficos y el reporte.
+
+Uso: python -m benchmarks.suite [--filtro TEXTO] [--repeticiones N] [--no-guardar]
+                                [--umbral 0.2] [--tolerancia-ms 0.05]
+
+Cada caso se mide con datos sintéticos de semilla fija (benchmarks/datos.py) y
+sin pasar por las caches. Las corridas se agregan a benchmarks/historial.jsonl
+(local a cada máquina, fuera de git) junto con el commit, y cada caso se
+compara con la última corrida guardada en la misma máquina: si el mejor
+tiempo de las repeticiones empeora más que --umbral (20% por defecto) y más
+que --tolerancia-ms en términos absolutos se marca como regresión y el proceso
+sale con código 1. Se compara el mínimo y no la mediana porque es el menos
+afectado por el ruido del sistema, y la tolerancia absoluta evita falsas
+regresiones en los casos de menos de un milisegundo. Antes de medir se corren las comprobaciones de
+resultados de comprobaciones(); si alguna falla también sale con código 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from benchmarks import datos
+
+HISTORIAL = os.path.join(os.path.dirname(__file__), 'historial.jsonl')
+HORIZONTES = (12, 120, 480, 1200)
+FILAS_PLANILLA = (100, 1000, 10000)
+
+def casos():
+    """Lista de (nombre, preparar) donde preparar() devuelve la función a medir"""
+    lista = []
+
+    def resolver(meses, solver):
+        def preparar():
+            from nucleo import resolver_EDO
+            funcion = resolver_EDO.__wrapped__
+            return lambda: funcion(8000, 1900, 3, meses, datos.VARIABLES_AHORRO, solver=solver)
+        return preparar
+
+    for meses in HORIZONTES:
+        for solver in ('analytic', 'odeint'):
+            lista.append((f"resolver_EDO[{solver},{meses}m]", resolver(meses, solver)))
+
+    def proyecciones(sensibilidad):
+        def preparar():
+            from cache import cache_resultados
+            from nucleo import calcular_proyecciones
+            archivo = {"gasto_total": 1900, "categorias": {"montos": [500, 400, 1000], "inflacion": [8, None, None]}}
+
+            def funcion():
+                # Sin cache, para medir el cálculo completo (incluido resolver_EDO)
+                cache_resultados.limpiar()
+                return calcular_proyecciones(1, 8000, 480, 3, archivo, datos.VARIABLES_AHORRO,
+                                             inflacion_por_categoria=True, sensibilidad=sensibilidad, n_sobol=2048 if sensibilidad else 0)
+            return funcion
+        return preparar
+
+    lista.append(("calcular_proyecciones[480m]", proyecciones(False)))
+    lista.append(("calcular_proyecciones[480m,sensibilidad]", proyecciones(True)))
+
+    def ingesta(filas, formato):
+        def preparar():
+            import ingesta
+            contenido = datos.archivo_gastos(filas, formato)
+            return lambda: ingesta.leer_columna_gasto(contenido, formato)
+        return preparar
+
+    def heredado(filas):
+        def preparar():
+            from nucleo import leer_gastos
+            file_data = datos.json_heredado(filas)
+            return lambda: leer_gastos(file_data)
+        return preparar
+
+    def carga(filas, formato):
+        def preparar():
+            import ingesta
+            contents = datos.contenido_upload(datos.archivo_gastos(filas, formato))
+            nombre = 'gastos.xlsx' if formato == 'excel' else f'gastos.{formato}'
+
+            def funcion():
+                # Carga completa de una subida nueva: decodificar, hash y leer las columnas
+                ingesta.cache_gastos.limpiar()
+                ingesta.cache_archivos.limpiar()
+                return ingesta.procesar_archivo(contents, nombre)
+            return funcion
+        return preparar
+
+    for filas in FILAS_PLANILLA:
+        lista.append((f"leer_columna_gasto[excel,{filas}]", ingesta(filas, 'excel')))
+        lista.append((f"leer_columna_gasto[csv,{filas}]", ingesta(filas, 'csv')))
+        lista.append((f"leer_gastos[json,{filas}]", heredado(filas)))
+        lista.append((f"procesar_archivo[excel,{filas}]", carga(filas, 'excel')))
+        lista.append((f"procesar_archivo[csv,{filas}]", carga(filas, 'csv')))
+
+    def grafico(nombre):
+        def preparar():
+            import generarReporte
+            resultados = datos.resultados_simulacion()
+            return lambda: generarReporte.GRAFICOS_REPORTE[nombre](resultados)
+        return preparar
+
+    for nombre in ('ingresos_gastos', 'comparativo', 'evolucion_simple', 'evolucion_edos', 'torta', 'sensibilidad'):
+        lista.append((f"generar_grafico[{nombre}]", grafico(nombre)))
+
+    def reporte():
+        import generarReporte
+        resultados = datos.resultados_simulacion()
+        return lambda: generarReporte.generar_reporte_completo(resultados)
+
+    lista.append(("generar_reporte_completo", reporte))
+    return lista
+
+def comprobaciones():
+    """Lista de (nombre, funcion) que verifican resultados; fallan con AssertionError"""
+    lista = []
+
+    def filtro_texto_en_columna_numerica():
+        import pandas as pd
+        from ingesta import filtrar_y_ordenar
+
+        df = pd.DataFrame({'Categoria': ['a', 5, None], 'Gasto mensual estimado': [100, 200, 300]})
+        # Los valores entre comillas llegan como texto desde la tabla
+        vista = filtrar_y_ordenar(df, '{Gasto mensual estimado} > "150"', None)
+        assert vista['Gasto mensual estimado'].tolist() == [200, 300], vista
+        # Un valor que no es número se ignora en vez de fallar
+        vista = filtrar_y_ordenar(df, '{Gasto mensual estimado} ge abc', None)
+        assert len(vista) == 3, vista
+        vista = filtrar_y_ordenar(df, '{Categoria} eq 5', None)
+        assert vista['Gasto mensual estimado'].tolist() == [200], vista
+
+    lista.append(("filtrar_y_ordenar[texto en columna numérica]", filtro_texto_en_columna_numerica))
+
+    def solver_analitico(meses, gasto, categorias):
+        def funcion():
+            import numpy as np
+            from nucleo import verificar_solver_analitico
+
+            gastos_categoria = (np.array([500.0, 400.0, 1000.0]), np.array([0.08, 0.03, 0.03]) / 12) \
+                if categorias else None
+            coincide, error = verificar_solver_analitico(8000, gasto, 3, meses, datos.VARIABLES_AHORRO,
+                                                         rtol=1e-6, gastos_categoria=gastos_categoria)
+            assert coincide, f"error relativo máximo {error:.2e} frente a odeint"
+        return funcion
+
+    # La solución cerrada debe coincidir con odeint (ahorro positivo, negativo y por categoría)
+    for meses in HORIZONTES:
+        lista.append((f"verificar_solver_analitico[{meses}m]", solver_analitico(meses, 1900, False)))
+    lista.append(("verificar_solver_analitico[120m,ahorro negativo]", solver_analitico(120, 9000, False)))
+    lista.append(("verificar_solver_analitico[120m,categorias]", solver_analitico(120, 1900, True)))
+    return lista
+
+def medir(funcion, repeticiones, tiempo_minimo=0.2):
+    """Mediana y mínimo en segundos por llamada.
+
+    Las funciones rápidas se agrupan en rondas de varias llamadas para que cada
+    medición dure al menos tiempo_minimo / repeticiones.
+    """
+    funcion()
+    inicio = time.perf_counter()
+    funcion()
+    una = max(time.perf_counter() - inicio, 1e-9)
+    por_ronda = max(1, int(tiempo_minimo / repeticiones / una))
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(por_ronda):
+            funcion()
+        tiempos.append((time.perf_counter() - inicio) / por_ronda)
+    return statistics.median(tiempos), min(tiempos)
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _maquina():
+    return f"{platform.machine()}|{platform.processor() or 'cpu'}|{os.cpu_count()}|py{platform.python_version()}"
+
+def ultima_corrida(maquina):
+    """Última corrida guardada en la misma máquina, o None"""
+    if not os.path.exists(HISTORIAL):
+        return None
+    ultima = None
+    with open(HISTORIAL, encoding='utf-8') as archivo:
+        for linea in archivo:
+            corrida = json.loads(linea)
+            if corrida.get('maquina') == maquina:
+                ultima = corrida
+    return ultima
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador")
+    parser.add_argument('--filtro', default='', help="solo casos cuyo nombre contiene este texto")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--umbral', type=float, default=0.2, help="empeoramiento relativo que cuenta como regresión")
+    parser.add_argument('--tolerancia-ms', type=float, default=0.05,
+                        help="empeoramiento absoluto (ms) por debajo del cual no hay regresión")
+    parser.add_argument('--no-guardar', action='store_true', help="no agregar la corrida al historial")
+    args = parser.parse_args(argv)
+
+    fallidas = []
+    for nombre, funcion in comprobaciones():
+        if args.filtro not in nombre:
+            continue
+        try:
+            funcion()
+        except AssertionError as e:
+            fallidas.append(nombre)
+            print(f"{nombre:45s} FALLA: {e}", flush=True)
+        else:
+            print(f"{nombre:45s} ok", flush=True)
+    if fallidas:
+        print(f"{len(fallidas)} comprobaciones fallidas: {', '.join(fallidas)}")
+        return 1
+
+    maquina = _maquina()
+    anterior = ultima_corrida(maquina)
+    previos = anterior['casos'] if anterior else {}
+
+    resultados = {}
+    regresiones = []
+    for nombre, preparar in casos():
+        if args.filtro not in nombre:
+            continue
+        mediana, minimo = medir(preparar(), args.repeticiones)
+        resultados[nombre] = {"mediana_s": mediana, "minimo_s": minimo}
+
+        comparacion = ""
+        if nombre in previos:
+            previo = previos[nombre]['minimo_s']
+            cambio = minimo / previo - 1
+            comparacion = f" ({cambio:+.0%} vs {anterior['commit'] or 'anterior'})"
+            if cambio > args.umbral and (minimo - previo) * 1000 > args.tolerancia_ms:
+                regresiones.append(nombre)
+                comparacion += " REGRESIÓN"
+        print(f"{nombre:45s} {minimo * 1000:10.3f} ms (mediana {mediana * 1000:.3f}){comparacion}", flush=True)
+
+    if not args.no_guardar and resultados:
+        corrida = {
+            "fecha": datetime.now().isoformat(timespec='seconds'),
+            "commit": _commit(),
+            "maquina": maquina,
+            "casos": resultados
+        }
+        with open(HISTORIAL, 'a', encoding='utf-8') as archivo:
+            archivo.write(json.dumps(corrida) + '\n')
+
+    if regresiones:
+        print(f"{len(regresiones)} regresiones: {', '.join(regresiones)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
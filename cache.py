@@ -0,0 +1,179 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+from metricas import contar_cache
+
+MAX_ENTRADAS = int(os.environ.get('CACHE_MAX_ENTRADAS', 256))
+TTL_SEGUNDOS = float(os.environ.get('CACHE_TTL', 3600))
+RUTA_SQLITE = os.environ.get('CACHE_SQLITE')
+
+def normalizar(valor):
+    """Convierte las entradas a tipos JSON estables para que claves equivalentes coincidan"""
+    if isinstance(valor, dict):
+        return {str(k): normalizar(v) for k, v in sorted(valor.items(), key=lambda x: str(x[0]))}
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [normalizar(v) for v in valor]
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return float(valor)
+    if isinstance(valor, bytes):
+        return hashlib.sha256(valor).hexdigest()
+    return valor
+
+def generar_clave(*partes):
+    """Hash SHA-256 de las entradas normalizadas"""
+    texto = json.dumps(normalizar(list(partes)), sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+class CacheResultados:
+    """Cache LRU con expiración por tiempo y un backend SQLite opcional.
+
+    Los valores se guardan serializados con pickle, así cada lectura devuelve una
+    copia independiente. Con serializar=False se guarda el objeto tal cual (solo en
+    memoria), útil para valores grandes que se tratan como de solo lectura. Con
+    ruta_sqlite varios procesos (workers de gunicorn) comparten los aciertos a
+    través del mismo archivo; tabla separa en él caches con límites distintos,
+    así el recorte de una no desaloja entradas de otra. nombre identifica a la
+    cache en las métricas de aciertos y fallos.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS, ruta_sqlite=None, serializar=True, nombre="resultados", tabla="cache"):
+        if ruta_sqlite and not serializar:
+            raise ValueError("El backend SQLite requiere serializar=True")
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.ruta_sqlite = ruta_sqlite
+        self.serializar = serializar
+        self.tabla = tabla
+        self.aciertos = 0
+        self.fallos = 0
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        if ruta_sqlite:
+            with self._conectar() as conexion:
+                conexion.execute("PRAGMA journal_mode=WAL")
+                conexion.execute(
+                    f"CREATE TABLE IF NOT EXISTS {tabla} ("
+                    "clave TEXT PRIMARY KEY, valor BLOB, creado REAL, usado REAL)"
+                )
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta_sqlite, timeout=5)
+
+    def _vigente(self, creado):
+        return self.ttl is None or time.time() - creado <= self.ttl
+
+    def obtener(self, clave):
+        """Devuelve (encontrado, valor)"""
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None:
+                creado, datos = entrada
+                if self._vigente(creado):
+                    self._memoria.move_to_end(clave)
+                    self.aciertos += 1
+                    contar_cache(self.nombre, True)
+                    return True, pickle.loads(datos) if self.serializar else datos
+                del self._memoria[clave]
+
+        if self.ruta_sqlite:
+            try:
+                with self._conectar() as conexion:
+                    fila = conexion.execute(
+                        f"SELECT valor, creado FROM {self.tabla} WHERE clave = ?", (clave,)
+                    ).fetchone()
+                    if fila is not None and self._vigente(fila[1]):
+                        conexion.execute(f"UPDATE {self.tabla} SET usado = ? WHERE clave = ?", (time.time(), clave))
+                        self._guardar_memoria(clave, fila[0], fila[1])
+                        with self._lock:
+                            self.aciertos += 1
+                        contar_cache(self.nombre, True)
+                        return True, pickle.loads(fila[0])
+                    if fila is not None:
+                        conexion.execute(f"DELETE FROM {self.tabla} WHERE clave = ?", (clave,))
+            except sqlite3.Error as e:
+                print(f"Error leyendo cache SQLite: {str(e)}")
+
+        with self._lock:
+            self.fallos += 1
+        contar_cache(self.nombre, False)
+        return False, None
+
+    def _guardar_memoria(self, clave, datos, creado):
+        with self._lock:
+            self._memoria[clave] = (creado, datos)
+            self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+
+    def guardar(self, clave, valor):
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL) if self.serializar else valor
+        ahora = time.time()
+        self._guardar_memoria(clave, datos, ahora)
+
+        if self.ruta_sqlite:
+            try:
+                with self._conectar() as conexion:
+                    conexion.execute(
+                        f"INSERT OR REPLACE INTO {self.tabla} (clave, valor, creado, usado) VALUES (?, ?, ?, ?)",
+                        (clave, datos, ahora, ahora)
+                    )
+                    conexion.execute(
+                        f"DELETE FROM {self.tabla} WHERE clave NOT IN "
+                        f"(SELECT clave FROM {self.tabla} ORDER BY usado DESC LIMIT ?)",
+                        (self.max_entradas,)
+                    )
+            except sqlite3.Error as e:
+                print(f"Error escribiendo cache SQLite: {str(e)}")
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+            self.aciertos = 0
+            self.fallos = 0
+        if self.ruta_sqlite:
+            with self._conectar() as conexion:
+                conexion.execute(f"DELETE FROM {self.tabla}")
+
+def memoizar(cache, ignorar=()):
+    """Decorador que guarda en cache el resultado según los argumentos normalizados.
+
+    Los parámetros en ignorar (p. ej. n_clicks) no forman parte de la clave y los
+    resultados None no se guardan.
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            entradas = {k: v for k, v in argumentos.arguments.items() if k not in ignorar}
+            clave = generar_clave(funcion.__module__, funcion.__qualname__, entradas)
+
+            encontrado, valor = cache.obtener(clave)
+            if encontrado:
+                return valor
+
+            valor = funcion(*args, **kwargs)
+            if valor is not None:
+                cache.guardar(clave, valor)
+            return valor
+
+        envoltura.cache = cache
+        return envoltura
+    return decorador
+
+cache_resultados = CacheResultados(ruta_sqlite=RUTA_SQLITE)
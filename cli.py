@@ -0,0 +1,106 @@
+"""Simulaciones por lote sin la interfaz web.
+
+Uso: python cli.py entrada.csv salida.parquet [--meses 120] [--workers N]
+
+La entrada (CSV, JSON o Parquet) tiene una fila por perfil con 'salario' y,
+opcionalmente, 'gasto', 'tasa_crecimiento', 'meses' y las variables de ahorro.
+La salida (CSV o Parquet, según la extensión; '-' escribe CSV por stdout) repite
+las columnas de entrada y agrega el ingreso neto, el ahorro mensual, el factor
+de ajuste y los saldos finales EDO al 3% y 7%.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+def leer_entrada(ruta):
+    import pandas as pd
+
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        return pd.read_csv(ruta)
+    if extension == '.json':
+        return pd.read_json(ruta)
+    if extension == '.parquet':
+        return pd.read_parquet(ruta)
+    raise ValueError(f"Formato de entrada no soportado: '{extension}'. Use CSV, JSON o Parquet")
+
+def escribir_salida(df, ruta):
+    if ruta == '-':
+        df.to_csv(sys.stdout, index=False)
+        return
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        df.to_csv(ruta, index=False)
+    elif extension == '.parquet':
+        df.to_parquet(ruta, index=False)
+    else:
+        raise ValueError(f"Formato de salida no soportado: '{extension}'. Use CSV o Parquet")
+
+def simular_bloque(tarea):
+    """Simula un bloque de perfiles en un proceso del pool"""
+    from nucleo import simular_perfiles
+
+    df, meses, tamano_bloque = tarea
+    return simular_perfiles(df, meses=meses, tamano_bloque=tamano_bloque)
+
+def simular_archivo(df, meses=120, workers=1, tamano_bloque=5000):
+    """Simula todos los perfiles de df repartiendo bloques entre workers procesos"""
+    import pandas as pd
+
+    workers = max(1, min(workers, len(df)))
+    tamano = -(-len(df) // workers) if len(df) else 1
+    tareas = [(df.iloc[inicio:inicio + tamano], meses, tamano_bloque) for inicio in range(0, len(df), tamano)]
+
+    if workers == 1:
+        resultados = [simular_bloque(tarea) for tarea in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            resultados = list(executor.map(simular_bloque, tareas))
+
+    if not resultados:
+        return df.copy()
+    return pd.concat([df, pd.concat(resultados)], axis=1)
+
+def plazo(texto):
+    """Tipo de argparse para --meses: entero entre 1 y MESES_MAX_OBJETIVO, como en la API"""
+    from nucleo import MESES_MAX_OBJETIVO
+
+    try:
+        meses = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{texto}' no es un número entero de meses")
+    if not 1 <= meses <= MESES_MAX_OBJETIVO:
+        raise argparse.ArgumentTypeError(f"debe estar entre 1 y {MESES_MAX_OBJETIVO}")
+    return meses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de ahorros por lote")
+    parser.add_argument('entrada', help="archivo CSV, JSON o Parquet con un perfil por fila")
+    parser.add_argument('salida', help="archivo CSV o Parquet de resultados ('-' para stdout)")
+    parser.add_argument('--meses', type=plazo, default=120, help="plazo para las filas sin columna 'meses' (por defecto 120)")
+    parser.add_argument('--workers', type=int, default=1, help="procesos para repartir los perfiles (por defecto 1)")
+    parser.add_argument('--tamano-bloque', type=int, default=5000, help="perfiles por bloque vectorizado")
+    args = parser.parse_args(argv)
+
+    try:
+        df = leer_entrada(args.entrada)
+        if 'salario' not in df.columns:
+            raise ValueError("La entrada debe tener una columna 'salario'")
+        if 'meses' in df.columns:
+            import pandas as pd
+            from nucleo import MESES_MAX_OBJETIVO
+            meses = pd.to_numeric(df['meses'], errors='coerce')
+            invalidas = df['meses'].notna() & ~meses.between(1, MESES_MAX_OBJETIVO)
+            if invalidas.any():
+                raise ValueError(f"La columna 'meses' debe estar entre 1 y {MESES_MAX_OBJETIVO} "
+                                 f"(fila {invalidas.to_numpy().argmax() + 1})")
+        resultado = simular_archivo(df, meses=args.meses, workers=args.workers, tamano_bloque=args.tamano_bloque)
+        escribir_salida(resultado, args.salida)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
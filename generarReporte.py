@@ -1,22 +1,22 @@
 import io
+import os
+import multiprocessing
+import time
+import uuid
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from functools import lru_cache
 from dash import dcc, Input, Output, State
 import dash_bootstrap_components as dbc
-import matplotlib
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
 from io import BytesIO
+import metricas
+from nucleo import R_3, R_7, serie_uniforme
 
 def generar_grafico_comparativo(resultados):
     """Genera gráfico comparativo de resultados, solo si los valores son no negativos"""
-    plt.close('all') 
-    fig = None  
+    from matplotlib.figure import Figure
+    
     try:
         montos = [
             resultados['resultados']['simple_0'],
@@ -29,7 +29,8 @@ def generar_grafico_comparativo(resultados):
             print("No se puede generar gráfico comparativo: valores negativos detectados")
             return None
         
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
         
         metodos = ['Simple 0%', 'Simple 3%', 'Simple 7%', 'EDO 3%', 'EDO 7%']
         colors = ['#3498db', '#2ecc71', '#f1c40f', '#e74c3c', '#9b59b6']
@@ -45,7 +46,7 @@ def generar_grafico_comparativo(resultados):
                     f'Bs. {height:,.2f}',
                     ha='center', va='bottom', fontsize=9)
 
-        plt.tight_layout()
+        fig.tight_layout()
         
         buf = BytesIO()
         fig.savefig(buf, format='png', dpi=150)
@@ -54,14 +55,11 @@ def generar_grafico_comparativo(resultados):
     except Exception as e:
         print(f"Error generando gráfico comparativo: {str(e)}")
         return None
-    finally:
-        if fig is not None:
-            plt.close(fig)
 
 def generar_grafico_evolucion_simple(resultados):
     """Genera gráfico de evolución para fórmulas simples, solo si los valores son no negativos"""
-    plt.close('all')
-    fig = None 
+    from matplotlib.figure import Figure
+    
     try:
         montos = [
             resultados['resultados']['simple_0'],
@@ -74,20 +72,15 @@ def generar_grafico_evolucion_simple(resultados):
             print("No se puede generar gráfico evolución simple: valores negativos detectados")
             return None
         
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
         
         meses = np.arange(0, resultados['datos_entrada']['meses'] + 1)
         pmt = resultados['datos_entrada']['ahorro_mensual'] / resultados['datos_entrada']['factor_ahorro']
         
-        def calcular_serie_uniforme(t, r):
-            if r == 0:
-                return pmt * t
-            r_mensual = r / 12
-            return pmt * ((1 + r_mensual)**t - 1) / r_mensual
-        
-        simple_0 = [calcular_serie_uniforme(t, 0.0) for t in meses]
-        simple_3 = [calcular_serie_uniforme(t, 0.03) for t in meses]
-        simple_7 = [calcular_serie_uniforme(t, 0.07) for t in meses]
+        simple_0 = serie_uniforme(pmt, 0, meses)
+        simple_3 = serie_uniforme(pmt, R_3, meses)
+        simple_7 = serie_uniforme(pmt, R_7, meses)
         
         ax.plot(meses, simple_0, label='Simple 0%', linestyle='--', color='#3498db', linewidth=2)
         ax.plot(meses, simple_3, label='Simple 3%', linestyle='--', color='#2ecc71', linewidth=2)
@@ -115,7 +108,7 @@ def generar_grafico_evolucion_simple(resultados):
                     bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
                     fontsize=9)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         buf = BytesIO()
         fig.savefig(buf, format='png', dpi=150)
@@ -124,14 +117,11 @@ def generar_grafico_evolucion_simple(resultados):
     except Exception as e:
         print(f"Error generando gráfico evolución simple: {str(e)}")
         return None
-    finally:
-        if fig is not None:
-            plt.close(fig)
 
 def generar_grafico_evolucion_edos(resultados):
     """Genera gráfico de evolución para modelos EDO, solo si los valores son no negativos"""
-    plt.close('all')
-    fig = None  
+    from matplotlib.figure import Figure
+    
     try:
         montos = [
             resultados['resultados']['simple_0'],
@@ -144,23 +134,12 @@ def generar_grafico_evolucion_edos(resultados):
             print("No se puede generar gráfico evolución EDO: valores negativos detectados")
             return None
         
-        fig, ax = plt.subplots(figsize=(8, 5))
-        
-        meses = np.arange(0, resultados['datos_entrada']['meses'] + 1)
-        pmt_0 = resultados['datos_entrada']['ahorro_mensual'] / resultados['datos_entrada']['factor_ahorro']
-        g = resultados['datos_entrada']['tasa_crecimiento'] / 100
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
         
-        def calcular_ahorro_edo(t, r):
-            s = [0.0] 
-            r_mensual = r / 12
-            g_mensual = g / 12
-            for i in range(1, len(t)):
-                pmt_t = pmt_0 * (1 + g_mensual)**i
-                s.append(s[-1] * (1 + r_mensual) + pmt_t)
-            return s
-        
-        edo_3 = calcular_ahorro_edo(meses, 0.03)
-        edo_7 = calcular_ahorro_edo(meses, 0.07)
+        meses = resultados['series']['t']
+        edo_3 = resultados['series']['A_3']
+        edo_7 = resultados['series']['A_7']
         
         ax.plot(meses, edo_3, label='EDO 3%', color='#e74c3c', linewidth=2)
         ax.plot(meses, edo_7, label='EDO 7%', color='#9b59b6', linewidth=2)
@@ -182,7 +161,7 @@ def generar_grafico_evolucion_edos(resultados):
                     bbox=dict(boxstyle='round,pad=0.5', fc='yellow', alpha=0.5),
                     fontsize=9)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         buf = BytesIO()
         fig.savefig(buf, format='png', dpi=150)
@@ -191,14 +170,11 @@ def generar_grafico_evolucion_edos(resultados):
     except Exception as e:
         print(f"Error generando gráfico evolución EDOs: {str(e)}")
         return None
-    finally:
-        if fig is not None:
-            plt.close(fig)
 
 def generar_grafico_torta(resultados):
     """Genera gráfico de torta comparativo, solo si los valores son no negativos"""
-    plt.close('all')
-    fig = None 
+    from matplotlib.figure import Figure
+    
     try:
         montos = [
             resultados['resultados']['simple_0'],
@@ -211,7 +187,8 @@ def generar_grafico_torta(resultados):
             print("No se puede generar gráfico de torta: valores negativos detectados")
             return None
         
-        fig, ax = plt.subplots(figsize=(6, 6))
+        fig = Figure(figsize=(6, 6))
+        ax = fig.add_subplot()
         
         labels = ['Simple 0%', 'Simple 3%', 'Simple 7%', 'EDO 3%', 'EDO 7%']
         sizes = montos
@@ -225,7 +202,7 @@ def generar_grafico_torta(resultados):
         ax.set_title('Distribución Comparativa de Resultados', pad=20)
         ax.axis('equal')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         buf = BytesIO()
         fig.savefig(buf, format='png', dpi=150)
@@ -234,14 +211,11 @@ def generar_grafico_torta(resultados):
     except Exception as e:
         print(f"Error generando gráfico torta: {str(e)}")
         return None
-    finally:
-        if fig is not None:
-            plt.close(fig)
 
 def generar_grafico_ingresos_gastos(resultados):
     """Genera gráfico de barras comparativo para ingreso bruto, ingreso neto, gasto mensual y ahorro mensual"""
-    plt.close('all')
-    fig = None
+    from matplotlib.figure import Figure
+    
     try:
         valores = [
             resultados['datos_entrada']['salario'],  # Ingreso bruto
@@ -253,7 +227,8 @@ def generar_grafico_ingresos_gastos(resultados):
             print("No se puede generar gráfico de ingresos y gastos: valores negativos detectados")
             return None
 
-        fig, ax = plt.subplots(figsize=(8, 5))
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
         
         categorias = ['Ingreso Bruto', 'Ingreso Neto', 'Gasto Mensual', 'Ahorro Mensual']
         colors = ['#3498db', '#2ecc71', '#e74c3c', '#f1c40f'] 
@@ -269,7 +244,7 @@ def generar_grafico_ingresos_gastos(resultados):
                     f'Bs. {height:,.2f}',
                     ha='center', va='bottom', fontsize=9)
 
-        plt.tight_layout()
+        fig.tight_layout()
         
         buf = BytesIO()
         fig.savefig(buf, format='png', dpi=150)
@@ -278,59 +253,246 @@ def generar_grafico_ingresos_gastos(resultados):
     except Exception as e:
         print(f"Error generando gráfico de ingresos y gastos: {str(e)}")
         return None
-    finally:
-        if fig is not None:
-            plt.close(fig)
 
-def generar_reporte_completo(resultados):
-    """Genera el reporte PDF con manejo seguro de recursos"""
+def generar_grafico_sensibilidad(resultados):
+    """Genera el gráfico de tornado del saldo EDO 7% con cada variable en sus extremos"""
+    from matplotlib.figure import Figure
+    
+    try:
+        if 'sensibilidad' not in resultados:
+            return None
+        tornado = resultados['sensibilidad']['tornado']
+        filas = tornado['variables'][::-1]
+        base = tornado['base']
+        posiciones = np.arange(len(filas))
+        
+        fig = Figure(figsize=(8, 5))
+        ax = fig.add_subplot()
+        
+        ax.barh(posiciones, [f['minimo'] - base for f in filas], left=base, color='#2ecc71', label='Valor mínimo')
+        ax.barh(posiciones, [f['maximo'] - base for f in filas], left=base, color='#e74c3c', label='Valor máximo')
+        ax.axvline(base, color='#34495e', linestyle='--', linewidth=1)
+        ax.set_yticks(posiciones)
+        ax.set_yticklabels([f['etiqueta'] for f in filas], fontsize=9)
+        
+        ax.set_title('Sensibilidad del Saldo EDO 7% por Variable', pad=20)
+        ax.set_xlabel('Monto Final (Bs)')
+        ax.grid(axis='x', linestyle='--', alpha=0.7)
+        ax.legend()
+        
+        fig.tight_layout()
+        
+        buf = BytesIO()
+        fig.savefig(buf, format='png', dpi=150)
+        buf.seek(0)
+        return buf
+    except Exception as e:
+        print(f"Error generando gráfico de sensibilidad: {str(e)}")
+        return None
+
+GRAFICOS_REPORTE = {
+    'ingresos_gastos': generar_grafico_ingresos_gastos,
+    'comparativo': generar_grafico_comparativo,
+    'evolucion_simple': generar_grafico_evolucion_simple,
+    'evolucion_edos': generar_grafico_evolucion_edos,
+    'torta': generar_grafico_torta,
+    'sensibilidad': generar_grafico_sensibilidad
+}
+
+# Procesos para renderizar los gráficos; por defecto en secuencia, porque levantar el pool
+# en cada trabajo cuesta más que los gráficos (ver benchmarks/bench_reporte.py)
+REPORTE_WORKERS = int(os.environ.get('REPORTE_WORKERS', 1))
+# Método de inicio de los procesos del pool; forkserver no hereda los hilos del proceso que arma el reporte
+REPORTE_INICIO = os.environ.get('REPORTE_INICIO', 'forkserver')
+
+def _renderizar_grafico(nombre, resultados):
+    """Renderiza un gráfico (en un proceso del pool o en el actual) y devuelve (bytes del PNG, segundos).
+
+    La duración viaja con el resultado porque las métricas del proceso del pool
+    no llegan al que arma el reporte.
+    """
+    inicio = time.perf_counter()
+    buf = GRAFICOS_REPORTE[nombre](resultados)
+    return (buf.getvalue() if buf else None), time.perf_counter() - inicio
+
+def _contexto_pool():
+    contexto = multiprocessing.get_context(REPORTE_INICIO)
+    if REPORTE_INICIO == 'forkserver':
+        contexto.set_forkserver_preload([__name__, 'matplotlib.figure', 'matplotlib.backends.backend_agg'])
+    return contexto
+
+def renderizar_graficos(resultados, workers=None):
+    """Renderiza todos los gráficos del reporte y devuelve {nombre: BytesIO o None}.
+
+    Por defecto se generan en secuencia. Con más de un worker (REPORTE_WORKERS) se
+    generan en paralelo en un pool de procesos que vive solo durante este reporte
+    (cada trabajo en segundo plano corre en un proceso nuevo, así que no habría
+    entre qué reutilizarlo); si el pool falla se generan en secuencia.
+    """
+    workers = REPORTE_WORKERS if workers is None else workers
+    nombres = list(GRAFICOS_REPORTE)
+    pngs = None
+    
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(nombres)), mp_context=_contexto_pool()) as pool:
+                pngs = list(pool.map(_renderizar_grafico, nombres, [resultados] * len(nombres)))
+        except Exception as e:
+            print(f"Error renderizando gráficos en paralelo, se generan en secuencia: {str(e)}")
+    
+    if pngs is None:
+        pngs = [_renderizar_grafico(nombre, resultados) for nombre in nombres]
+    
+    for nombre, (_, segundos) in zip(nombres, pngs):
+        metricas.observar_etapa("grafico_reporte", segundos, grafico=nombre)
+    return {nombre: BytesIO(png) if png else None for nombre, (png, _) in zip(nombres, pngs)}
+
+@lru_cache(maxsize=1)
+def _plantilla_reporte():
+    """Estilos de párrafo y de tabla del reporte; se construyen una sola vez por proceso.
+
+    reportlab se importa recién aquí para que los workers web no lo carguen al arrancar.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    
+    styles = getSampleStyleSheet()
+    
+    estilo_titulo = ParagraphStyle(
+        'Titulo',
+        parent=styles['Heading1'],
+        fontSize=16,
+        alignment=1,
+        spaceAfter=12,
+        textColor=colors.HexColor("#000000"),
+        fontName='Helvetica-Bold'
+    )
+    
+    estilo_subtitulo = ParagraphStyle(
+        'Subtitulo',
+        parent=styles['Heading2'],
+        fontSize=12,
+        spaceAfter=6,
+        textColor=colors.HexColor("#000000"),
+        fontName='Helvetica-Bold'
+    )
+    
+    estilo_texto = ParagraphStyle(
+        'Texto',
+        parent=styles['BodyText'],
+        fontSize=10,
+        spaceAfter=12,
+        leading=14
+    )
+    
+    estilo_celda = ParagraphStyle(
+        'Celda',
+        parent=styles['BodyText'],
+        fontSize=8,
+        leading=10,
+        spaceAfter=0,
+        spaceBefore=0
+    )
+    
+    return {
+        'estilos': {
+            'titulo': estilo_titulo,
+            'subtitulo': estilo_subtitulo,
+            'texto': estilo_texto,
+            'celda': estilo_celda,
+            'pie': ParagraphStyle(name='Pie', parent=styles['BodyText'], fontSize=8, textColor=colors.grey)
+        },
+        'tablas': {
+            'portada': TableStyle([
+                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                ('LEFTPADDING', (0,0), (0,-1), 0),
+                ('RIGHTPADDING', (0,0), (0,-1), 12),
+                ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,-1), 10),
+                ('BOTTOMPADDING', (0,0), (-1,-1), 6)
+            ]),
+            'entrada': TableStyle([
+                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+                ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
+                ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,-1), 9),
+                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')])
+            ]),
+            'variables': TableStyle([
+                ('VALIGN', (0,0), (-1,-1), 'TOP'),
+                ('ALIGN', (1,0), (1,-1), 'RIGHT'),
+                ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
+                ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,-1), 8),
+                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')]),
+                ('LEFTPADDING', (0,0), (-1,-1), 4),
+                ('RIGHTPADDING', (0,0), (-1,-1), 4),
+                ('TOPPADDING', (0,0), (-1,-1), 4),
+                ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+                ('WORDWRAP', (0,0), (-1,-1), 'CJK')
+            ]),
+            'comparativa': TableStyle([
+                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+                ('ALIGN', (2,0), (-1,-1), 'RIGHT'),
+                ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
+                ('TEXTCOLOR', (0,0), (-1,0), colors.black),
+                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0,0), (-1,-1), 9),
+                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
+                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f5f9fc')]),
+                ('LEFTPADDING', (0,0), (-1,-1), 4),
+                ('RIGHTPADDING', (0,0), (-1,-1), 4)
+            ])
+        }
+    }
+
+SECCIONES_REPORTE = [
+    "Generando gráficos",
+    "Portada y resumen ejecutivo",
+    "Análisis detallado",
+    "Comparación visual",
+    "Análisis de sensibilidad",
+    "Conclusión y recomendaciones",
+    "Anexos técnicos",
+    "Armando PDF"
+]
+
+@metricas.medir("reporte_pdf")
+def generar_reporte_completo(resultados, progreso=None):
+    """Genera el reporte PDF con manejo seguro de recursos.
+
+    progreso, si se indica, se llama como progreso(paso, total, seccion) al iniciar cada sección.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak, Image
+    
+    def avanzar(seccion):
+        if progreso:
+            progreso(SECCIONES_REPORTE.index(seccion), len(SECCIONES_REPORTE), seccion)
+    
     try:
+        avanzar("Generando gráficos")
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4,
                                rightMargin=inch/2, leftMargin=inch/2,
                                topMargin=inch/2, bottomMargin=inch/2)
         
-        styles = getSampleStyleSheet()
-        
-        estilo_titulo = ParagraphStyle(
-            'Titulo',
-            parent=styles['Heading1'],
-            fontSize=16,
-            alignment=1,
-            spaceAfter=12,
-            textColor=colors.HexColor("#000000"),
-            fontName='Helvetica-Bold'
-        )
-        
-        estilo_subtitulo = ParagraphStyle(
-            'Subtitulo',
-            parent=styles['Heading2'],
-            fontSize=12,
-            spaceAfter=6,
-            textColor=colors.HexColor("#000000"),
-            fontName='Helvetica-Bold'
-        )
-        
-        estilo_texto = ParagraphStyle(
-            'Texto',
-            parent=styles['BodyText'],
-            fontSize=10,
-            spaceAfter=12,
-            leading=14
-        )
-        
-        estilo_celda = ParagraphStyle(
-            'Celda',
-            parent=styles['BodyText'],
-            fontSize=8,
-            leading=10,
-            spaceAfter=0,
-            spaceBefore=0
-        )
+        plantilla = _plantilla_reporte()
+        estilos = plantilla['estilos']
+        
+        imagenes = renderizar_graficos(resultados)
         
+        avanzar("Portada y resumen ejecutivo")
         story = []
 
-        titulo_portada = Paragraph("<para align=center><b>REPORTE COMPLETO DE SIMULACIÓN DE AHORROS</b><br/><br/><font size=12>Análisis Financiero Detallado</font></para>", estilo_titulo)
+        titulo_portada = Paragraph("<para align=center><b>REPORTE COMPLETO DE SIMULACIÓN DE AHORROS</b><br/><br/><font size=12>Análisis Financiero Detallado</font></para>", estilos['titulo'])
         
         story.append(Spacer(1, 2*inch))
         story.append(titulo_portada)
@@ -344,18 +506,11 @@ def generar_reporte_completo(resultados):
         ]
         
         tabla_portada = Table(info_portada, colWidths=[2*inch, 3*inch])
-        tabla_portada.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('LEFTPADDING', (0,0), (0,-1), 0),
-            ('RIGHTPADDING', (0,0), (0,-1), 12),
-            ('FONTNAME', (0,0), (0,-1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 10),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 6)
-        ]))
+        tabla_portada.setStyle(plantilla['tablas']['portada'])
         story.append(tabla_portada)
         story.append(PageBreak())
         
-        story.append(Paragraph("1. RESUMEN EJECUTIVO", estilo_subtitulo))
+        story.append(Paragraph("1. RESUMEN EJECUTIVO", estilos['subtitulo']))
         story.append(Spacer(1, 0.2*inch))
         
         mejor_resultado = max(resultados['resultados'].items(), key=lambda x: x[1])
@@ -371,12 +526,13 @@ def generar_reporte_completo(resultados):
         
         <b>Conclusiones preliminares:</b> {f'Los resultados negativos indican que tus gastos superan tus ingresos, lo que requiere una acción inmediata para reducir gastos.' if mejor_resultado[1] < 0 else 'La elección de la estrategia de ahorro puede variar significativamente el resultado final. Se recomienda considerar tanto el rendimiento esperado como el perfil de riesgo.'}
         """
-        story.append(Paragraph(resumen_texto, estilo_texto))
+        story.append(Paragraph(resumen_texto, estilos['texto']))
         
-        story.append(Paragraph("2. ANÁLISIS DETALLADO", estilo_subtitulo))
+        avanzar("Análisis detallado")
+        story.append(Paragraph("2. ANÁLISIS DETALLADO", estilos['subtitulo']))
         story.append(Spacer(1, 0.2*inch))
         
-        story.append(Paragraph("<b>Detalle de Parámetros de Entrada:</b>", estilo_subtitulo))
+        story.append(Paragraph("<b>Detalle de Parámetros de Entrada:</b>", estilos['subtitulo']))
         
         datos_entrada = [
             ["Parámetro", "Valor", "Descripción"],
@@ -400,6 +556,11 @@ def generar_reporte_completo(resultados):
                 f"Bs. {resultados['datos_entrada']['gasto']:,.2f}", 
                 "Gastos fijos mensuales"
             ],
+            [
+                "Gasto mensual al final", 
+                f"Bs. {resultados['datos_entrada'].get('gasto_final', resultados['datos_entrada']['gasto']):,.2f}", 
+                "Con inflación por categoría" if resultados['datos_entrada'].get('inflacion_por_categoria') else "Sin inflación por categoría"
+            ],
             [
                 "Ahorro mensual inicial", 
                 f"Bs. {resultados['datos_entrada']['ahorro_mensual']:,.2f}", 
@@ -418,31 +579,22 @@ def generar_reporte_completo(resultados):
         ]
         
         tabla_entrada = Table(datos_entrada, colWidths=[1.8*inch, 1.5*inch, 3*inch])
-        tabla_entrada.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 9),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')])
-        ]))
+        tabla_entrada.setStyle(plantilla['tablas']['entrada'])
         story.append(tabla_entrada)
         story.append(Spacer(1, 0.3*inch))
 
-        story.append(Paragraph("<b>Comparación Visual de Ingresos, Gastos y Ahorro:</b>", estilo_texto))
-        img_ingresos_gastos = generar_grafico_ingresos_gastos(resultados)
+        story.append(Paragraph("<b>Comparación Visual de Ingresos, Gastos y Ahorro:</b>", estilos['texto']))
+        img_ingresos_gastos = imagenes['ingresos_gastos']
         if img_ingresos_gastos:
             story.append(Image(img_ingresos_gastos, width=6*inch, height=3.5*inch))
         else:
             story.append(Paragraph(
                 "<b>Nota:</b> No se generó el gráfico de ingresos y gastos debido a valores negativos.",
-                estilo_texto
+                estilos['texto']
             ))
         story.append(Spacer(1, 0.3*inch))
 
-        story.append(Paragraph("<b>Variables que Afectan al Ahorro:</b>", estilo_subtitulo))
+        story.append(Paragraph("<b>Variables que Afectan al Ahorro:</b>", estilos['subtitulo']))
         try:
             vars_ahorro = resultados['datos_entrada'].get('variables_ahorro', {})
             default_vars = {
@@ -460,73 +612,59 @@ def generar_reporte_completo(resultados):
             
             datos_variables = [
                 [
-                    Paragraph("<b>Variable</b>", estilo_celda),
-                    Paragraph("<b>Valor</b>", estilo_celda),
-                    Paragraph("<b>Descripción</b>", estilo_celda)
+                    Paragraph("<b>Variable</b>", estilos['celda']),
+                    Paragraph("<b>Valor</b>", estilos['celda']),
+                    Paragraph("<b>Descripción</b>", estilos['celda'])
                 ],
                 [
-                    Paragraph("Expectativas de Ingresos", estilo_celda),
-                    Paragraph(f"{vars_ahorro['expectativas_ingresos']:.2f}", estilo_celda),
-                    Paragraph("Expectativas sobre ingresos futuros. Valores bajos (optimistas) aumentan el ahorro; altos (pesimistas) lo reducen.", estilo_celda)
+                    Paragraph("Expectativas de Ingresos", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['expectativas_ingresos']:.2f}", estilos['celda']),
+                    Paragraph("Expectativas sobre ingresos futuros. Valores bajos (optimistas) aumentan el ahorro; altos (pesimistas) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Tasa de Interés", estilo_celda),
-                    Paragraph(f"{vars_ahorro['tasa_interes']:.2f}", estilo_celda),
-                    Paragraph("Tasa de interés esperada(Deudas futuras). Valores bajos fomentan el ahorro; altos incentivan el consumo.", estilo_celda)
+                    Paragraph("Tasa de Interés", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['tasa_interes']:.2f}", estilos['celda']),
+                    Paragraph("Tasa de interés esperada(Deudas futuras). Valores bajos fomentan el ahorro; altos incentivan el consumo.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Inflación", estilo_celda),
-                    Paragraph(f"{vars_ahorro['inflacion']:.2f}", estilo_celda),
-                    Paragraph("Inflación esperada. Valores bajos preservan el poder adquisitivo, favoreciendo el ahorro; altos lo reducen.", estilo_celda)
+                    Paragraph("Inflación", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['inflacion']:.2f}", estilos['celda']),
+                    Paragraph("Inflación esperada. Valores bajos preservan el poder adquisitivo, favoreciendo el ahorro; altos lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Preferencias Temporales", estilo_celda),
-                    Paragraph(f"{vars_ahorro['preferencias_temporales']:.2f}", estilo_celda),
-                    Paragraph("Gastos futuros. Orientación hacia el futuro o presente. Valores bajos (futuro) aumentan el ahorro; altos (presente) lo reducen.", estilo_celda)
+                    Paragraph("Preferencias Temporales", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['preferencias_temporales']:.2f}", estilos['celda']),
+                    Paragraph("Gastos futuros. Orientación hacia el futuro o presente. Valores bajos (futuro) aumentan el ahorro; altos (presente) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Educación Financiera", estilo_celda),
-                    Paragraph(f"{vars_ahorro['educacion_financiera']:.2f}", estilo_celda),
-                    Paragraph("Nivel de conocimiento financiero. Valores bajos (alta educación) favorecen el ahorro; altos (baja) lo reducen.", estilo_celda)
+                    Paragraph("Educación Financiera", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['educacion_financiera']:.2f}", estilos['celda']),
+                    Paragraph("Nivel de conocimiento financiero. Valores bajos (alta educación) favorecen el ahorro; altos (baja) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Riesgo de Desempleo", estilo_celda),
-                    Paragraph(f"{vars_ahorro['riesgo_desempleo']:.2f}", estilo_celda),
-                    Paragraph("Probabilidad de desempleo. Valores bajos (bajo riesgo) aumentan el ahorro; altos (alto riesgo) lo reducen.", estilo_celda)
+                    Paragraph("Riesgo de Desempleo", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['riesgo_desempleo']:.2f}", estilos['celda']),
+                    Paragraph("Probabilidad de desempleo. Valores bajos (bajo riesgo) aumentan el ahorro; altos (alto riesgo) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Situación Familiar", estilo_celda),
-                    Paragraph(f"{vars_ahorro['situacion_familiar']:.2f}", estilo_celda),
-                    Paragraph("Responsabilidades familiares. Valores bajos (menos dependientes) favorecen el ahorro; altos (más dependientes) lo reducen.", estilo_celda)
+                    Paragraph("Situación Familiar", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['situacion_familiar']:.2f}", estilos['celda']),
+                    Paragraph("Responsabilidades familiares. Valores bajos (menos dependientes) favorecen el ahorro; altos (más dependientes) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Gastos de Salud", estilo_celda),
-                    Paragraph(f"{vars_ahorro['gastos_salud']:.2f}", estilo_celda),
-                    Paragraph("Gastos médicos esperados. Valores bajos (bajos gastos) aumentan el ahorro; altos (altos gastos) lo reducen.", estilo_celda)
+                    Paragraph("Gastos de Salud", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['gastos_salud']:.2f}", estilos['celda']),
+                    Paragraph("Gastos médicos esperados. Valores bajos (bajos gastos) aumentan el ahorro; altos (altos gastos) lo reducen.", estilos['celda'])
                 ],
                 [
-                    Paragraph("Estabilidad Laboral", estilo_celda),
-                    Paragraph(f"{vars_ahorro['estabilidad_laboral']:.2f}", estilo_celda),
-                    Paragraph("Estabilidad del empleo. Valores bajos (estable) favorecen el ahorro; altos (inestable) lo reducen.", estilo_celda)
+                    Paragraph("Estabilidad Laboral", estilos['celda']),
+                    Paragraph(f"{vars_ahorro['estabilidad_laboral']:.2f}", estilos['celda']),
+                    Paragraph("Estabilidad del empleo. Valores bajos (estable) favorecen el ahorro; altos (inestable) lo reducen.", estilos['celda'])
                 ]
             ]
             
             tabla_variables = Table(datos_variables, colWidths=[1.5*inch, 1.0*inch, 4.5*inch])
-            tabla_variables.setStyle(TableStyle([
-                ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                ('ALIGN', (1,0), (1,-1), 'RIGHT'),
-                ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
-                ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0,0), (-1,-1), 8),
-                ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-                ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f8f9fa')]),
-                ('LEFTPADDING', (0,0), (-1,-1), 4),
-                ('RIGHTPADDING', (0,0), (-1,-1), 4),
-                ('TOPPADDING', (0,0), (-1,-1), 4),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-                ('WORDWRAP', (0,0), (-1,-1), 'CJK')
-            ]))
+            tabla_variables.setStyle(plantilla['tablas']['variables'])
             tabla_variables._argW = [1.5*inch, 1.0*inch, 4.5*inch]
             story.append(tabla_variables)
             story.append(Spacer(1, 0.3*inch))
@@ -538,18 +676,18 @@ def generar_reporte_completo(resultados):
                 Un valor de 1.0 es neutral; valores < 1.0 aumentan el ahorro; valores > 1.0 lo reducen. 
                 El factor de ajuste final es {factor_ahorro:.2f}.
                 """,
-                estilo_texto
+                estilos['texto']
             ))
             story.append(Spacer(1, 0.3*inch))
         except Exception as e:
             print(f"Error generando tabla de variables de ahorro: {str(e)}")
             story.append(Paragraph(
                 "<b>Error:</b> No se pudieron incluir las variables de ahorro debido a un problema con los datos.",
-                estilo_texto
+                estilos['texto']
             ))
             story.append(Spacer(1, 0.3*inch))
 
-        story.append(Paragraph("<b>Comparación Detallada de Métodos:</b>", estilo_subtitulo))
+        story.append(Paragraph("<b>Comparación Detallada de Métodos:</b>", estilos['subtitulo']))
         story.append(Spacer(1, 0.1*inch))
         
         datos_comparativos = [
@@ -587,18 +725,7 @@ def generar_reporte_completo(resultados):
         ]
         
         tabla_comparativa = Table(datos_comparativos, colWidths=[1.8*inch, 0.8*inch, 1.5*inch, 1.5*inch, 2*inch])
-        tabla_comparativa.setStyle(TableStyle([
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('ALIGN', (2,0), (-1,-1), 'RIGHT'),
-            ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#F2F567")),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.black),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 9),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.lightgrey),
-            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f5f9fc')]),
-            ('LEFTPADDING', (0,0), (-1,-1), 4),
-            ('RIGHTPADDING', (0,0), (-1,-1), 4)
-        ]))
+        tabla_comparativa.setStyle(plantilla['tablas']['comparativa'])
         story.append(tabla_comparativa)
         story.append(Spacer(1, 0.3*inch))
         
@@ -606,29 +733,30 @@ def generar_reporte_completo(resultados):
         <b>Interpretación:</b> Esta tabla muestra el rendimiento comparativo de los diferentes métodos de cálculo. 
         La columna "Diferencia" indica cuánto más (o menos) se obtiene respecto al método base (0% de interés). 
         La rentabilidad anualizada combina el interés con el crecimiento salarial en los modelos EDO.
-        """, estilo_texto))
+        """, estilos['texto']))
         
         story.append(PageBreak())
         
-        story.append(Paragraph("<b>Comparación Visual de Resultados:</b>", estilo_texto))
-        img_comparativo = generar_grafico_comparativo(resultados)
+        avanzar("Comparación visual")
+        story.append(Paragraph("<b>Comparación Visual de Resultados:</b>", estilos['texto']))
+        img_comparativo = imagenes['comparativo']
         if img_comparativo:
             story.append(Image(img_comparativo, width=6*inch, height=3.5*inch))
         else:
             story.append(Paragraph(
                 "<b>Nota:</b> No se generó el gráfico debido a resultados negativos. Esto indica que tus gastos superan tus ingresos, generando un déficit proyectado.",
-                estilo_texto
+                estilos['texto']
             ))
         story.append(Spacer(1, 0.2*inch))
 
-        story.append(Paragraph("<b>Evolución Temporal - Fórmulas Simples:</b>", estilo_texto))
-        img_evol_simple = generar_grafico_evolucion_simple(resultados)
+        story.append(Paragraph("<b>Evolución Temporal - Fórmulas Simples:</b>", estilos['texto']))
+        img_evol_simple = imagenes['evolucion_simple']
         if img_evol_simple:
             story.append(Image(img_evol_simple, width=6*inch, height=4*inch))
         else:
             story.append(Paragraph(
                 "<b>Nota:</b> No se generó el gráfico debido a resultados negativos. Esto indica que tus gastos superan tus ingresos, generando un déficit proyectado.",
-                estilo_texto
+                estilos['texto']
             ))
         story.append(Spacer(1, 0.2*inch))
         
@@ -636,18 +764,18 @@ def generar_reporte_completo(resultados):
         <b>Análisis fórmulas simples:</b> Este modelo considera aportes constantes sin crecimiento salarial, 
         con capitalización mensual de intereses. Las líneas punteadas muestran la progresión acumulada 
         bajo diferentes tasas de interés anual.
-        """, estilo_texto))
+        """, estilos['texto']))
         
         story.append(PageBreak())
         
-        story.append(Paragraph("<b>Evolución Temporal - Modelos EDO:</b>", estilo_texto))
-        img_evol_edos = generar_grafico_evolucion_edos(resultados)
+        story.append(Paragraph("<b>Evolución Temporal - Modelos EDO:</b>", estilos['texto']))
+        img_evol_edos = imagenes['evolucion_edos']
         if img_evol_edos:
             story.append(Image(img_evol_edos, width=6*inch, height=4*inch))
         else:
             story.append(Paragraph(
                 "<b>Nota:</b> No se generó el gráfico debido a resultados negativos. Esto indica que tus gastos superan tus ingresos, generando un déficit proyectado.",
-                estilo_texto
+                estilos['texto']
             ))
         story.append(Spacer(1, 0.2*inch))
         
@@ -655,22 +783,55 @@ def generar_reporte_completo(resultados):
         <b>Análisis modelos EDO:</b> Este modelo considera crecimiento salarial del {resultados['datos_entrada']['tasa_crecimiento']}% anual, 
         con aportes variables que aumentan progresivamente. Las líneas continuas muestran la evolución 
         considerando tasas de interés compuesto más crecimiento salarial.
-        """, estilo_texto))
+        """, estilos['texto']))
         
         story.append(Spacer(1, 0.02*inch))
 
-        story.append(Paragraph("<b>Distribución Comparativa de Resultados:</b>", estilo_texto))
-        img_torta = generar_grafico_torta(resultados)
+        story.append(Paragraph("<b>Distribución Comparativa de Resultados:</b>", estilos['texto']))
+        img_torta = imagenes['torta']
         if img_torta:
             story.append(Image(img_torta, width=4.5*inch, height=4.5*inch))
         else:
             story.append(Paragraph(
                 "<b>Nota:</b> No se generó el gráfico debido a resultados negativos. Esto indica que tus gastos superan tus ingresos, generando un déficit proyectado.",
-                estilo_texto
+                estilos['texto']
             ))
         story.append(PageBreak())
         
-        story.append(Paragraph("Conclusión del Análisis Financiero", estilo_subtitulo))
+        if 'sensibilidad' in resultados:
+            avanzar("Análisis de sensibilidad")
+            story.append(Paragraph("<b>Análisis de Sensibilidad de las Variables de Ahorro:</b>", estilos['subtitulo']))
+            img_sensibilidad = imagenes['sensibilidad']
+            if img_sensibilidad:
+                story.append(Image(img_sensibilidad, width=6*inch, height=3.75*inch))
+            story.append(Spacer(1, 0.2*inch))
+            
+            sobol = {f['variable']: f for f in resultados['sensibilidad'].get('sobol', {}).get('variables', [])}
+            datos_sensibilidad = [["#", "Variable", "Saldo mínimo", "Saldo máximo", "Rango", "Sobol total"]]
+            for i, fila in enumerate(resultados['sensibilidad']['tornado']['variables'], start=1):
+                datos_sensibilidad.append([
+                    str(i),
+                    fila['etiqueta'],
+                    f"Bs. {fila['minimo']:,.2f}",
+                    f"Bs. {fila['maximo']:,.2f}",
+                    f"Bs. {fila['impacto']:,.2f}",
+                    f"{sobol[fila['variable']]['total']:.3f}" if fila['variable'] in sobol else "-"
+                ])
+            tabla_sensibilidad = Table(datos_sensibilidad, colWidths=[0.3*inch, 1.8*inch, 1.3*inch, 1.3*inch, 1.2*inch, 0.9*inch])
+            tabla_sensibilidad.setStyle(plantilla['tablas']['comparativa'])
+            story.append(tabla_sensibilidad)
+            story.append(Spacer(1, 0.2*inch))
+            
+            story.append(Paragraph("""
+            <b>Interpretación:</b> Cada barra muestra el saldo final del modelo EDO al 7% cuando una sola variable 
+            toma su valor más favorable o más desfavorable y las demás quedan como fueron elegidas. Las variables 
+            están ordenadas de mayor a menor impacto. El índice de Sobol total indica qué parte de la variabilidad 
+            del saldo explica cada variable considerando todas las combinaciones posibles.
+            """, estilos['texto']))
+            story.append(PageBreak())
+        
+        avanzar("Conclusión y recomendaciones")
+        story.append(Paragraph("Conclusión del Análisis Financiero", estilos['subtitulo']))
         story.append(Spacer(1, 0.0*inch))
         
         ahorro_mensual = resultados['datos_entrada']['ahorro_mensual']
@@ -718,9 +879,9 @@ def generar_reporte_completo(resultados):
             Intenta aumentar tu ahorro en un 5% (Bs. {ahorro_mensual*0.05:,.2f}) y colócalo en una cuenta con buena rentabilidad.
             """
         
-        story.append(Paragraph(conclusion_texto, estilo_texto))
+        story.append(Paragraph(conclusion_texto, estilos['texto']))
 
-        story.append(Paragraph("3. RECOMENDACIONES ESTRATÉGICAS", estilo_subtitulo))
+        story.append(Paragraph("3. RECOMENDACIONES ESTRATÉGICAS", estilos['subtitulo']))
         story.append(Spacer(1, 0.2*inch))
         
         recomendaciones = [
@@ -739,12 +900,13 @@ def generar_reporte_completo(resultados):
         ]
         
         for titulo, desc in recomendaciones:
-            story.append(Paragraph(f"<b>{titulo}:</b> {desc}", estilo_texto))
+            story.append(Paragraph(f"<b>{titulo}:</b> {desc}", estilos['texto']))
             story.append(Spacer(1, 0.1*inch))
         
         story.append(PageBreak())
         
-        story.append(Paragraph("4. ANEXOS TÉCNICOS", estilo_subtitulo))
+        avanzar("Anexos técnicos")
+        story.append(Paragraph("4. ANEXOS TÉCNICOS", estilos['subtitulo']))
         story.append(Spacer(1, 0.2*inch))
         
         anexos = [
@@ -759,40 +921,51 @@ def generar_reporte_completo(resultados):
         ]
         
         for titulo, contenido in anexos:
-            story.append(Paragraph(f"<b>{titulo}:</b>", estilo_subtitulo))
-            story.append(Paragraph(contenido, estilo_texto))
+            story.append(Paragraph(f"<b>{titulo}:</b>", estilos['subtitulo']))
+            story.append(Paragraph(contenido, estilos['texto']))
             story.append(Spacer(1, 0.2*inch))
         
         story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph("<i>Documento generado automáticamente - Sistema de Simulación Financiera v2.0</i>", 
-                             ParagraphStyle(name='Pie', parent=styles['BodyText'], fontSize=8, textColor=colors.grey)))
+        story.append(Paragraph("<i>Documento generado automáticamente - Sistema de Simulación Financiera v2.0</i>", estilos['pie']))
         
+        avanzar("Armando PDF")
         doc.build(story)
         buffer.seek(0)
         return buffer
     except Exception as e:
         print(f"Error generando reporte completo: {str(e)}")
         raise
-    finally:
-        plt.close('all')
 
 def register_callbacks(app):
     @app.callback(
-        [Output("descargar-reporte", "data"),
-         Output("reporte-error", "children")],
-        Input("generar-reporte", "n_clicks"),
-        State("store-resultados", "data"),
+        output=[Output("descargar-reporte", "data"),
+                Output("reporte-error", "children")],
+        inputs=Input("generar-reporte", "n_clicks"),
+        state=State("store-resultados", "data"),
+        background=True,
+        running=[
+            (Output("generar-reporte", "disabled"), True, False),
+            (Output("contenedor-progreso-reporte", "style"), {"display": "block"}, {"display": "none"})
+        ],
+        progress=[Output("progreso-reporte", "value"),
+                  Output("progreso-reporte", "label"),
+                  Output("estado-reporte", "children")],
         prevent_initial_call=True
     )
-    def descargar_reporte(n_clicks, resultados):
+    def descargar_reporte(set_progress, n_clicks, resultados):
         if not n_clicks or not resultados:
             return None, dbc.Alert("No hay datos para generar el reporte. Calcule las proyecciones primero.", color="warning")
+        
+        trabajo = uuid.uuid4().hex[:8]
+        
+        def progreso(paso, total, seccion):
+            porcentaje = int(100 * paso / total)
+            set_progress((porcentaje, f"{porcentaje}%", f"Trabajo {trabajo}: {seccion}"))
             
         try:
-            plt.close('all')
-            print("Iniciando generación de reporte...")  
-            pdf_buffer = generar_reporte_completo(resultados)
-            print("Reporte generado exitosamente.") 
+            print(f"Iniciando generación de reporte (trabajo {trabajo})...")  
+            pdf_buffer = generar_reporte_completo(resultados, progreso=progreso)
+            print(f"Reporte generado exitosamente (trabajo {trabajo}).") 
             
             montos = [
                 resultados['resultados']['simple_0'],
@@ -809,8 +982,10 @@ def register_callbacks(app):
                 filename=f"Reporte_Ahorros_Detallado_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf"
             ), None
         except Exception as e:
-            error_msg = f"Error al generar el reporte: {str(e)}"
+            error_msg = f"Error al generar el reporte (trabajo {trabajo}): {str(e)}"
             print(error_msg)
+            metricas.contar_error("reporte_pdf")
             return None, dbc.Alert(error_msg, color="danger")
         finally:
-            plt.close('all')
\ No newline at end of file
+            # El trabajo corre en su propio proceso: lo medido solo llega a /metrics vía METRICAS_SQLITE
+            metricas.registro.volcar(forzar=True)
@@ -0,0 +1,275 @@
+import base64
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache import CacheResultados, RUTA_SQLITE
+from metricas import medir
+
+COLUMNA_GASTO = 'Gasto mensual estimado'
+COLUMNA_INFLACION = 'Inflacion anual'  # opcional, % anual por categoría
+FORMATOS = {
+    '.xlsx': 'excel',
+    '.xlsm': 'excel',
+    '.xls': 'excel',
+    '.csv': 'csv',
+    '.parquet': 'parquet'
+}
+FILAS_POR_BLOQUE = 50000
+
+# Gastos por categoría ya parseados (arreglo float64 de n x 2: monto e inflación),
+# compartible entre workers vía SQLite
+cache_gastos = CacheResultados(max_entradas=256, ttl=None, ruta_sqlite=RUTA_SQLITE, nombre="gastos")
+# Contenido original de cada archivo subido con vista previa, para reconstruir su
+# DataFrame en cualquier worker; tabla propia, así no compite con los gastos
+cache_archivos = CacheResultados(max_entradas=32, ttl=3600, ruta_sqlite=RUTA_SQLITE, nombre="archivos", tabla="archivos")
+# DataFrames completos para la tabla paginada y, aparte, sus vistas filtradas/ordenadas,
+# así muchas vistas no desalojan los archivos; solo en memoria, sin copiar
+cache_dataframes = CacheResultados(max_entradas=8, ttl=3600, serializar=False, nombre="dataframes")
+cache_vistas = CacheResultados(max_entradas=16, ttl=600, serializar=False, nombre="vistas")
+
+OPERADORES_FILTRO = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith ']
+]
+
+def decodificar(contents):
+    """Decodifica el contenido base64 que entrega dcc.Upload"""
+    _, content_string = contents.split(',', 1)
+    return base64.b64decode(content_string)
+
+def detectar_formato(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{extension or filename}'. Use Excel, CSV o Parquet")
+    return FORMATOS[extension]
+
+def _a_numeros(valores):
+    return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').to_numpy(dtype=float)
+
+def _filas_gasto(montos, inflacion=None):
+    """Arreglo (n, 2) con monto e inflación anual (NaN si no viene) de cada categoría.
+
+    Las filas sin monto numérico (títulos de grupo, celdas vacías) se descartan.
+    """
+    montos = _a_numeros(montos)
+    inflacion = _a_numeros(inflacion) if inflacion is not None else np.full(montos.shape, np.nan)
+    validas = ~np.isnan(montos)
+    return np.column_stack([montos[validas], inflacion[validas]])
+
+def _filas_gasto_df(df):
+    if COLUMNA_GASTO not in df.columns:
+        return np.empty((0, 2))
+    return _filas_gasto(df[COLUMNA_GASTO], df[COLUMNA_INFLACION] if COLUMNA_INFLACION in df.columns else None)
+
+def leer_columna_gasto(datos, formato):
+    """Lee solo las columnas de gasto sin cargar el archivo completo en un DataFrame.
+
+    Devuelve un arreglo (n, 2) con el monto de cada categoría y su inflación anual
+    (columna opcional COLUMNA_INFLACION, NaN si falta). Excel (.xlsx) se recorre
+    fila a fila con openpyxl en modo solo lectura, CSV por bloques de
+    FILAS_POR_BLOQUE filas y Parquet leyendo únicamente esas columnas.
+    Si la columna de gasto no existe devuelve un arreglo vacío.
+    """
+    if formato == 'excel':
+        try:
+            from openpyxl import load_workbook
+            libro = load_workbook(io.BytesIO(datos), read_only=True, data_only=True)
+        except Exception:
+            # .xls antiguos u otros formatos que openpyxl no abre en modo streaming
+            return _filas_gasto_df(pd.read_excel(io.BytesIO(datos)))
+        try:
+            filas = libro.active.iter_rows(values_only=True)
+            encabezado = next(filas, ())
+            if COLUMNA_GASTO not in encabezado:
+                return np.empty((0, 2))
+            indice = encabezado.index(COLUMNA_GASTO)
+            indice_inflacion = encabezado.index(COLUMNA_INFLACION) if COLUMNA_INFLACION in encabezado else None
+            montos, inflacion = [], []
+            for fila in filas:
+                if len(fila) > indice:
+                    montos.append(fila[indice])
+                    inflacion.append(fila[indice_inflacion] if indice_inflacion is not None and len(fila) > indice_inflacion else None)
+            return _filas_gasto(montos, inflacion)
+        finally:
+            libro.close()
+
+    if formato == 'csv':
+        encabezado = pd.read_csv(io.BytesIO(datos), nrows=0).columns
+        if COLUMNA_GASTO not in encabezado:
+            return np.empty((0, 2))
+        columnas = [c for c in (COLUMNA_GASTO, COLUMNA_INFLACION) if c in encabezado]
+        bloques = pd.read_csv(io.BytesIO(datos), usecols=columnas, chunksize=FILAS_POR_BLOQUE)
+        partes = [_filas_gasto_df(bloque) for bloque in bloques]
+        return np.concatenate(partes) if partes else np.empty((0, 2))
+
+    if formato == 'parquet':
+        import pyarrow.parquet as pq
+        encabezado = pq.read_schema(io.BytesIO(datos)).names
+        if COLUMNA_GASTO not in encabezado:
+            return np.empty((0, 2))
+        columnas = [c for c in (COLUMNA_GASTO, COLUMNA_INFLACION) if c in encabezado]
+        return _filas_gasto_df(pd.read_parquet(io.BytesIO(datos), columns=columnas))
+
+    raise ValueError(f"Formato no soportado: {formato}")
+
+def leer_dataframe(datos, formato):
+    """Lee el archivo completo (para la tabla de la vista previa)"""
+    if formato == 'excel':
+        return pd.read_excel(io.BytesIO(datos))
+    if formato == 'csv':
+        return pd.read_csv(io.BytesIO(datos))
+    if formato == 'parquet':
+        return pd.read_parquet(io.BytesIO(datos))
+    raise ValueError(f"Formato no soportado: {formato}")
+
+@medir("carga_archivo")
+def procesar_archivo(contents, filename, vista_previa=True):
+    """Procesa un archivo subido y devuelve su resumen.
+
+    El resumen trae la clave (hash SHA-256 del contenido), el nombre, el formato,
+    la cantidad de gastos y el gasto total; store-file-data guarda solo la clave y
+    el total. Solo se leen las columnas de gasto y el monto e inflación de cada
+    categoría quedan en cache_gastos por clave (ver obtener_gastos), así volver a
+    subir el mismo archivo no lo parsea de nuevo. Con vista_previa el contenido
+    queda en cache_archivos y consultar_pagina arma el DataFrame completo recién
+    cuando se pide la tabla.
+    """
+    datos = decodificar(contents)
+    formato = detectar_formato(filename)
+    clave = hashlib.sha256(datos).hexdigest()
+
+    if vista_previa and not cache_archivos.obtener(clave)[0]:
+        cache_archivos.guardar(clave, (datos, formato))
+
+    gastos = obtener_gastos(clave)
+    if gastos is None:
+        gastos = leer_columna_gasto(datos, formato)
+        cache_gastos.guardar(_clave_gastos(clave), gastos)
+
+    gasto_total = float(gastos[:, 0].sum())
+    resumen = {
+        "clave": clave,
+        "nombre": filename,
+        "formato": formato,
+        "filas": int(len(gastos)),
+        "gasto_total": gasto_total if gasto_total >= 0 else 0
+    }
+    return resumen
+
+def _clave_gastos(clave):
+    # Sufijo propio: entradas SQLite anteriores guardaban solo la columna de montos
+    return f"{clave}:categorias"
+
+def obtener_gastos(clave):
+    """Arreglo (n, 2) con monto e inflación de cada categoría del archivo con esa clave,
+    o None si ya no está en cache"""
+    encontrado, gastos = cache_gastos.obtener(_clave_gastos(clave))
+    return gastos if encontrado else None
+
+def _separar_filtro(parte):
+    """Separa una condición de filter_query de DataTable en (columna, operador, valor)"""
+    for operadores in OPERADORES_FILTRO:
+        for operador in operadores:
+            if operador in parte:
+                nombre, valor = parte.split(operador, 1)
+                nombre = nombre[nombre.find('{') + 1: nombre.rfind('}')]
+                valor = valor.strip()
+                if valor and valor[0] == valor[-1] and valor[0] in ("'", '"', '`'):
+                    valor = valor[1:-1].replace('\\' + valor[0], valor[0])
+                else:
+                    try:
+                        valor = float(valor)
+                    except ValueError:
+                        pass
+                return nombre, operadores[0].strip(), valor
+    return None, None, None
+
+def _comparables(serie, valor):
+    """(serie, valor) del mismo tipo para comparar; valor es None si no se puede.
+
+    En una columna numérica el texto se convierte a número; las demás (texto o
+    tipos mezclados, como títulos entre montos) se comparan como texto, y un
+    número como 5.0 se busca como '5'.
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        numero = pd.to_numeric(valor, errors='coerce')
+        return serie, None if pd.isna(numero) else float(numero)
+    if isinstance(valor, float):
+        valor = str(int(valor)) if valor.is_integer() else str(valor)
+    return serie.astype(str), str(valor)
+
+def filtrar_y_ordenar(df, filtro, orden):
+    """Aplica filter_query y sort_by (formato de DataTable) a df"""
+    if filtro:
+        for parte in filtro.split(' && '):
+            columna, operador, valor = _separar_filtro(parte)
+            if columna not in df.columns:
+                continue
+            if operador in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+                serie, valor = _comparables(df[columna], valor)
+                if valor is None:
+                    print(f"Filtro ignorado: la columna '{columna}' es numérica y '{parte}' no compara con un número")
+                    continue
+                df = df.loc[getattr(serie, operador)(valor)]
+            elif operador == 'contains':
+                df = df.loc[df[columna].astype(str).str.contains(str(valor), case=False, regex=False, na=False)]
+            elif operador == 'datestartswith':
+                df = df.loc[df[columna].astype(str).str.startswith(str(valor), na=False)]
+    if orden:
+        df = df.sort_values(
+            [col['column_id'] for col in orden],
+            ascending=[col['direction'] == 'asc' for col in orden],
+            kind='mergesort'
+        )
+    return df
+
+def obtener_dataframe(clave):
+    """DataFrame completo del archivo con esa clave, o None si su contenido ya no está en cache.
+
+    Si el DataFrame no está en este proceso (se desalojó o el archivo se subió en
+    otro worker) se vuelve a leer del contenido guardado en cache_archivos.
+    """
+    encontrado, df = cache_dataframes.obtener(clave)
+    if encontrado:
+        return df
+    encontrado, archivo = cache_archivos.obtener(clave)
+    if not encontrado:
+        return None
+    datos, formato = archivo
+    df = leer_dataframe(datos, formato)
+    cache_dataframes.guardar(clave, df)
+    return df
+
+def consultar_pagina(clave, pagina, tamano, orden=None, filtro=''):
+    """Devuelve (registros, total_paginas, columnas) de una página del archivo con esa clave.
+
+    La vista filtrada/ordenada se guarda en cache_vistas, así cambiar de página solo
+    corta filas. Devuelve None si el archivo ya no está en cache.
+    """
+    df = obtener_dataframe(clave)
+    if df is None:
+        return None
+
+    if filtro or orden:
+        clave_vista = f"{clave}:{filtro}:{orden}"
+        encontrado, vista = cache_vistas.obtener(clave_vista)
+        if not encontrado:
+            vista = filtrar_y_ordenar(df, filtro, orden)
+            cache_vistas.guardar(clave_vista, vista)
+    else:
+        vista = df
+
+    inicio = pagina * tamano
+    registros = vista.iloc[inicio:inicio + tamano].to_dict('records')
+    total_paginas = max(1, -(-len(vista) // tamano))
+    return registros, total_paginas, list(df.columns)
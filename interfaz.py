@@ -1,11 +1,37 @@
 import dash_bootstrap_components as dbc
-from dash import dcc, html, Input, Output, State, dash_table
+from dash import ctx, dcc, html, no_update, ClientsideFunction, Input, Output, Patch, State, dash_table
 from dash.exceptions import PreventUpdate
-import io
-import pandas as pd  
-import base64
+
+TAMANO_PAGINA = 10
+MUESTRAS_SOBOL = 2048
+# Puntos de las curvas de la vista previa que se calcula en el navegador
+PUNTOS_VISTA_PREVIA = 600
+# En modo en vivo se recalcula tras esta pausa sin cambios en los datos
+ESPERA_EN_VIVO_MS = 400
+
+# Pestaña -> gráfico que se dibuja una vez por sesión y luego solo recibe las trazas nuevas
+GRAFICOS_PERSISTENTES = {
+    "tab-comparacion": "grafico-comparacion",
+    "tab-evolucion": "grafico-evolucion",
+    "tab-edos": "grafico-edos"
+}
+
+ENTRADAS_SIMULACION = [
+    "salario-mensual", "meses-ahorro", "tasa-crecimiento", "expectativas-ingresos", "tasa-interes", "inflacion",
+    "preferencias-temporales", "educacion-financiera", "riesgo-desempleo", "situacion-familiar", "gastos-salud",
+    "estabilidad-laboral", "inflacion-por-categoria"
+]
 
 def layout():
+    from algoritmo import construir_grafico_comparacion, construir_grafico_evolucion, construir_grafico_detalle
+    from nucleo import AFP_TASA, R_3, R_7
+    
+    figuras = {
+        "grafico-comparacion": construir_grafico_comparacion(),
+        "grafico-evolucion": construir_grafico_evolucion(),
+        "grafico-edos": construir_grafico_detalle()
+    }
+    
     return html.Div([
         dbc.Card([
             dbc.CardBody([
@@ -49,6 +75,22 @@ def layout():
                     ], md=4)
                 ], className="mb-4"),
                 
+                # Se actualiza en el navegador (assets/vista_previa.js) mientras se escribe
+                dbc.Card([
+                    dbc.CardHeader("Vista previa: Fórmula Simple"),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([html.Div("0% Interés:", className="fw-bold"), html.Span(id="previa-simple-0")], md=4),
+                            dbc.Col([html.Div("3% Interés:", className="fw-bold"), html.Span(id="previa-simple-3")], md=4),
+                            dbc.Col([html.Div("7% Interés:", className="fw-bold"), html.Span(id="previa-simple-7")], md=4)
+                        ], className="mb-2"),
+                        dcc.Graph(id="grafico-vista-previa", config={'displayModeBar': False}, style={"height": "260px"})
+                    ])
+                ], className="mb-4"),
+                dcc.Store(id="constantes-simple", data={
+                    "afp": AFP_TASA, "r_3": R_3, "r_7": R_7, "max_puntos": PUNTOS_VISTA_PREVIA
+                }),
+                
                 dbc.Accordion([
                     dbc.AccordionItem([
                         dbc.Row([
@@ -200,8 +242,65 @@ def layout():
                                     className="mb-4"
                                 )
                             ], md=4)
-                        ])
-                    ], title="Variables que afectan al ahorro", item_id="variables-ahorro")
+                        ]),
+                        dbc.Switch(
+                            id="inflacion-por-categoria",
+                            label="Aplicar inflación a cada categoría de gasto",
+                            value=False
+                        )
+                    ], title="Variables que afectan al ahorro", item_id="variables-ahorro"),
+                    dbc.AccordionItem([
+                        dbc.Row([
+                            dbc.Col([
+                                dbc.Label("Saldo objetivo (Bs.):", html_for="saldo-objetivo"),
+                                dbc.Input(
+                                    id="saldo-objetivo",
+                                    type="number",
+                                    value=100000,
+                                    min=0,
+                                    step=1000,
+                                    className="mb-3"
+                                )
+                            ], md=3),
+                            dbc.Col([
+                                dbc.Label("Buscar:", html_for="variable-objetivo"),
+                                dcc.Dropdown(
+                                    id="variable-objetivo",
+                                    options=[
+                                        {'label': 'Salario mínimo', 'value': 'salario'},
+                                        {'label': 'Gasto mensual máximo', 'value': 'gasto'},
+                                        {'label': 'Plazo mínimo (meses)', 'value': 'meses'}
+                                    ],
+                                    value='salario',
+                                    clearable=False,
+                                    className="mb-3"
+                                )
+                            ], md=3),
+                            dbc.Col([
+                                dbc.Label("Modelo:", html_for="tasa-objetivo"),
+                                dcc.Dropdown(
+                                    id="tasa-objetivo",
+                                    options=[
+                                        {'label': 'EDO 3%', 'value': 3},
+                                        {'label': 'EDO 7%', 'value': 7}
+                                    ],
+                                    value=7,
+                                    clearable=False,
+                                    className="mb-3"
+                                )
+                            ], md=3),
+                            dbc.Col([
+                                dbc.Label("\u00a0"),
+                                dbc.Button(
+                                    "Buscar",
+                                    id="buscar-objetivo",
+                                    color="secondary",
+                                    className="w-100 mb-3"
+                                )
+                            ], md=3)
+                        ]),
+                        html.Div(id="resultado-objetivo")
+                    ], title="Buscar objetivo de ahorro", item_id="buscar-objetivo")
                 ], start_collapsed=True, className="mb-4"),
                 
                 dbc.Row([
@@ -223,10 +322,27 @@ def layout():
                             disabled=True
                         ),
                         width="auto"
+                    ),
+                    dbc.Col(
+                        dbc.Switch(id="modo-en-vivo", label="Recalcular en vivo", value=False, className="mb-0"),
+                        width="auto",
+                        className="d-flex align-items-center"
+                    ),
+                    dbc.Col(
+                        dbc.InputGroup([
+                            dbc.Input(id="nombre-escenario", placeholder="Nombre del escenario", type="text"),
+                            dbc.Button("Guardar escenario", id="guardar-escenario", color="info"),
+                            dbc.Button("Borrar escenarios", id="borrar-escenarios", color="light")
+                        ]),
+                        md=6
                     )
                 ], className="g-3 mb-4"),
                 
                 html.Div(id="reporte-error"),
+                html.Div([
+                    html.Small(id="estado-reporte", className="text-muted"),
+                    dbc.Progress(id="progreso-reporte", value=0, striped=True, animated=True, className="mb-3")
+                ], id="contenedor-progreso-reporte", style={"display": "none"}),
                 
                 dbc.Tabs([
                     dbc.Tab(label="Datos de Entrada", tab_id="tab-datos"),
@@ -234,17 +350,116 @@ def layout():
                     dbc.Tab(label="Comparación", tab_id="tab-comparacion"),
                     dbc.Tab(label="Evolución", tab_id="tab-evolucion"),
                     dbc.Tab(label="Detalle EDOs", tab_id="tab-edos"),
+                    dbc.Tab(label="Sensibilidad", tab_id="tab-sensibilidad"),
+                    dbc.Tab(label="Escenarios", tab_id="tab-escenarios"),
                 ], id="tabs", active_tab="tab-datos", className="mb-4"),
                 
                 html.Div(id="tabs-content"),
+                html.Div([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dcc.Graph(
+                                id=grafico,
+                                figure=figuras[grafico],
+                                config={'displayModeBar': True},
+                                className="mb-4"
+                            )
+                        ])
+                    ], id=f"tarjeta-{grafico}", style={"display": "none"})
+                    for grafico in GRAFICOS_PERSISTENTES.values()
+                ]),
                 dcc.Download(id="descargar-reporte"),
                 dcc.Store(id="store-resultados"),
-                dcc.Store(id="store-file-data")
+                dcc.Store(id="respuesta-resultados"),
+                dcc.Store(id="solicitud-en-vivo"),
+                dcc.Store(id="solicitud-calculo"),
+                dcc.Store(id="config-en-vivo", data={"espera_ms": ESPERA_EN_VIVO_MS}),
+                dcc.Store(id="config-graficos", data=GRAFICOS_PERSISTENTES),
+                dcc.Store(id="graficos-dibujados"),
+                dcc.Store(id="store-file-data"),
+                dcc.Store(id="store-escenarios", storage_type="session")
             ])
         ])
     ])
 
+def render_escenarios(escenarios):
+    """Contenido de la pestaña de escenarios: gráfico comparativo y tabla"""
+    if not escenarios:
+        return dbc.Alert(
+            "No hay escenarios guardados. Escriba un nombre y use \"Guardar escenario\" para agregar los datos actuales.",
+            color="info",
+            className="my-4"
+        )
+    
+    from algoritmo import construir_grafico_escenarios
+    
+    filas = [
+        {
+            "Escenario": e['nombre'],
+            "Salario": f"Bs. {float(e['salario']):,.2f}",
+            "Meses": int(e['meses']),
+            "Ahorro mensual": f"Bs. {e['resultado']['ahorro_mensual']:,.2f}",
+            "Factor": f"{e['resultado']['factor_ahorro']:.2f}",
+            "Simple 0%": f"Bs. {e['resultado']['simple_0']:,.2f}",
+            "EDO 3%": f"Bs. {e['resultado']['edo_3']:,.2f}",
+            "EDO 7%": f"Bs. {e['resultado']['edo_7']:,.2f}"
+        }
+        for e in escenarios
+    ]
+    return dbc.Card([
+        dbc.CardBody([
+            dcc.Graph(
+                figure=construir_grafico_escenarios(escenarios),
+                config={'displayModeBar': True},
+                className="mb-4"
+            ),
+            dash_table.DataTable(
+                data=filas,
+                columns=[{'name': col, 'id': col} for col in filas[0]],
+                sort_action='native',
+                style_table={'overflowX': 'auto'},
+                style_cell={'fontFamily': 'Arial', 'textAlign': 'left', 'padding': '10px'},
+                style_header={'backgroundColor': "#000000", 'color': 'white', 'fontWeight': 'bold'}
+            )
+        ])
+    ])
+
+def rango_zoom(relayout, eje="xaxis"):
+    """Rango (x0, x1) de un eje según relayoutData.
+    
+    Devuelve None si el usuario volvió a la vista completa y False si el
+    evento no cambió ese eje (por ejemplo, un zoom solo en el eje y).
+    """
+    if not relayout:
+        return False
+    if relayout.get(f"{eje}.autorange"):
+        return None
+    if f"{eje}.range[0]" in relayout and f"{eje}.range[1]" in relayout:
+        return (float(relayout[f"{eje}.range[0]"]), float(relayout[f"{eje}.range[1]"]))
+    if f"{eje}.range" in relayout:
+        return tuple(float(x) for x in relayout[f"{eje}.range"])
+    return False
+
+def _olvidar_trazas(grafico):
+    """Parche de graficos-dibujados tras redibujar un gráfico con otros x (zoom)"""
+    parche = Patch()
+    parche[grafico] = None
+    return parche
+
 def register_callbacks(app):
+    # La fórmula simple es cerrada: se calcula en el navegador sin pasar por el servidor
+    app.clientside_callback(
+        ClientsideFunction(namespace="simulador", function_name="vista_previa"),
+        [Output("previa-simple-0", "children"),
+         Output("previa-simple-3", "children"),
+         Output("previa-simple-7", "children"),
+         Output("grafico-vista-previa", "figure")],
+        [Input("salario-mensual", "value"),
+         Input("meses-ahorro", "value"),
+         Input("store-file-data", "data")],
+        State("constantes-simple", "data")
+    )
+
     @app.callback(
         [Output("output-data-upload", "children"),
          Output("store-file-data", "data")],
@@ -253,31 +468,43 @@ def register_callbacks(app):
     )
     def update_output(contents, filename):
         if not contents:
+            # El Upload se vuelve a crear al entrar a la pestaña: no se borra el archivo ya cargado
             return html.Div([
                 dbc.Alert(
-                    "Suba un archivo Excel con datos de gastos mensuales",
+                    "Suba un archivo Excel, CSV o Parquet con datos de gastos mensuales",
                     color="info",
                     className="mb-3"
                 )
-            ]), None
-        
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
+            ]), no_update
         
         try:
-            df = pd.read_excel(io.BytesIO(decoded))
-            file_data = df.to_json(date_format='iso', orient='split')
+            from ingesta import procesar_archivo
+            
+            # La tabla se llena con paginar_tabla al aparecer: el DataFrame completo
+            # se arma recién ahí y al navegador solo viaja una página por vez
+            resumen = procesar_archivo(contents, filename)
+            # Por sesión solo viajan la clave y el total; el detalle por categoría queda en cache_gastos
+            file_data = {"clave": resumen["clave"], "gasto_total": resumen["gasto_total"]}
             
             table = html.Div([
                 dbc.Alert(
-                    f"Archivo cargado: {filename}",
+                    f"Archivo cargado: {filename} ({resumen['filas']} gastos, total Bs. {resumen['gasto_total']:,.2f})",
                     color="success",
                     className="mb-3"
                 ),
                 dash_table.DataTable(
-                    data=df.to_dict('records'),
-                    columns=[{'name': col, 'id': col} for col in df.columns],
-                    page_size=10,
+                    id="tabla-gastos",
+                    data=[],
+                    columns=[],
+                    page_current=0,
+                    page_size=TAMANO_PAGINA,
+                    page_count=1,
+                    page_action='custom',
+                    sort_action='custom',
+                    sort_mode='multi',
+                    sort_by=[],
+                    filter_action='custom',
+                    filter_query='',
                     style_table={
                         'overflowX': 'auto',
                         'border': 'thin lightgrey solid',
@@ -312,20 +539,55 @@ def register_callbacks(app):
                 className="mb-3"
             ), None
 
+    @app.callback(
+        [Output("tabla-gastos", "data"),
+         Output("tabla-gastos", "page_count"),
+         Output("tabla-gastos", "columns")],
+        [Input("tabla-gastos", "page_current"),
+         Input("tabla-gastos", "page_size"),
+         Input("tabla-gastos", "sort_by"),
+         Input("tabla-gastos", "filter_query")],
+        State("store-file-data", "data")
+    )
+    def paginar_tabla(page_current, page_size, sort_by, filter_query, file_data):
+        if not file_data:
+            return [], 1, []
+
+        from ingesta import consultar_pagina
+
+        pagina = consultar_pagina(
+            file_data['clave'], page_current or 0, page_size or TAMANO_PAGINA,
+            orden=sort_by, filtro=filter_query
+        )
+        if pagina is None:
+            print("Tabla de gastos fuera de cache; vuelva a subir el archivo")
+            return [], 1, []
+        registros, total_paginas, columnas = pagina
+        return registros, total_paginas, [{'name': col, 'id': col} for col in columnas]
+
     @app.callback(
         Output("tabs-content", "children"),
         [Input("tabs", "active_tab"),
-         Input("store-resultados", "data")]
+         Input("store-resultados", "data"),
+         Input("store-escenarios", "data")]
     )
-    def render_tab_content(active_tab, resultados):
+    def render_tab_content(active_tab, resultados, escenarios):
+        if active_tab == "tab-escenarios":
+            return render_escenarios(escenarios)
+        if ctx.triggered_id == "store-escenarios":
+            raise PreventUpdate
+        
         if active_tab == "tab-datos":
+            # La pestaña de datos no depende de los resultados; rehacerla volvería a crear el Upload
+            if ctx.triggered_id == "store-resultados":
+                raise PreventUpdate
             return dbc.Card([
                 dbc.CardBody([
                     dcc.Upload(
                         id="upload-data",
                         children=html.Div([
                             html.I(className="bi bi-cloud-arrow-up me-2"),
-                            "Arrastra o selecciona un archivo Excel"
+                            "Arrastra o selecciona un archivo Excel, CSV o Parquet"
                         ]),
                         style={
                             'width': '100%',
@@ -350,6 +612,8 @@ def register_callbacks(app):
                 className="my-4"
             )
         
+        from algoritmo import construir_grafico_sensibilidad
+        
         if active_tab == "tab-resumen":
             datos = resultados["datos_entrada"]
             res = resultados["resultados"]
@@ -374,6 +638,10 @@ def register_callbacks(app):
                                     html.Div("Gasto Mensual:", className="fw-bold"),
                                     f"Bs. {datos['gasto']:,.2f}"
                                 ]),
+                                dbc.ListGroupItem([
+                                    html.Div("Gasto al Final del Período:", className="fw-bold"),
+                                    f"Bs. {datos.get('gasto_final', datos['gasto']):,.2f}"
+                                ]),
                                 dbc.ListGroupItem([
                                     html.Div("Ahorro Mensual:", className="fw-bold"),
                                     f"Bs. {datos['ahorro_mensual']:,.2f}"
@@ -424,43 +692,289 @@ def register_callbacks(app):
                 ])
             ])
         
-        elif active_tab == "tab-comparacion":
-            return dbc.Card([
-                dbc.CardBody([
-                    dcc.Graph(
-                        figure=resultados["graficos"]["comparacion"],
-                        config={'displayModeBar': True},
-                        className="mb-4"
-                    )
-                ])
-            ])
+        elif active_tab in GRAFICOS_PERSISTENTES:
+            # Estos gráficos viven fuera de tabs-content y se actualizan con parches
+            return None
         
-        elif active_tab == "tab-evolucion":
+        elif active_tab == "tab-sensibilidad":
+            if "sensibilidad" not in resultados:
+                return dbc.Alert(
+                    "Vuelva a calcular las proyecciones para ver el análisis de sensibilidad.",
+                    color="info",
+                    className="my-4"
+                )
+            ranking = resultados["sensibilidad"]["tornado"]["variables"]
             return dbc.Card([
                 dbc.CardBody([
                     dcc.Graph(
-                        figure=resultados["graficos"]["evolucion"],
+                        figure=construir_grafico_sensibilidad(resultados),
                         config={'displayModeBar': True},
                         className="mb-4"
-                    )
+                    ),
+                    html.H5("Ranking de variables", className="mb-3"),
+                    dbc.ListGroup([
+                        dbc.ListGroupItem([
+                            html.Div(f"{i}. {fila['etiqueta']}", className="fw-bold"),
+                            f"Bs. {fila['minimo']:,.2f} a Bs. {fila['maximo']:,.2f} (rango Bs. {fila['impacto']:,.2f})"
+                        ])
+                        for i, fila in enumerate(ranking, start=1)
+                    ], flush=True)
                 ])
             ])
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="simulador", function_name="mostrar_graficos"),
+        [Output(f"tarjeta-{grafico}", "style") for grafico in GRAFICOS_PERSISTENTES.values()],
+        [Input("tabs", "active_tab"),
+         Input("store-resultados", "data")],
+        State("config-graficos", "data")
+    )
+
+    # Cada gráfico persistente recuerda qué x tiene dibujados (graficos-dibujados);
+    # si no cambiaron, el parche lleva solo los valores y
+    @app.callback(
+        [Output("grafico-comparacion", "figure"),
+         Output("grafico-evolucion", "figure", allow_duplicate=True),
+         Output("grafico-edos", "figure", allow_duplicate=True),
+         Output("graficos-dibujados", "data")],
+        Input("store-resultados", "data"),
+        State("graficos-dibujados", "data"),
+        prevent_initial_call=True
+    )
+    def actualizar_graficos(resultados, dibujados):
+        if not resultados:
+            raise PreventUpdate
         
-        elif active_tab == "tab-edos":
-            return dbc.Card([
-                dbc.CardBody([
-                    dcc.Graph(
-                        figure=resultados["graficos"]["detalle"],
-                        config={'displayModeBar': True},
-                        className="mb-4"
-                    )
-                ])
-            ])
+        from algoritmo import (MAX_PUNTOS_SERIE, construir_grafico_comparacion, construir_grafico_evolucion,
+                               construir_grafico_detalle, parche_datos)
+        from cache import generar_clave
+        
+        dibujados = dibujados or {}
+        # Las series reducidas con LTTB eligen otros x en cada cálculo
+        reducidas = len(resultados["series"]["t"]) > MAX_PUNTOS_SERIE
+        firma_series = None if reducidas else resultados["datos_entrada"]["meses"]
+        firmas = {
+            "grafico-comparacion": "barras",
+            "grafico-evolucion": firma_series,
+            "grafico-edos": firma_series
+        }
+        
+        def solo_y(grafico):
+            return firmas[grafico] is not None and dibujados.get(grafico) == firmas[grafico]
+        
+        revision = generar_clave(resultados["datos_entrada"])
+        return (
+            parche_datos(construir_grafico_comparacion(resultados), revision, ejes=(),
+                         solo_y=solo_y("grafico-comparacion")),
+            parche_datos(construir_grafico_evolucion(resultados), revision,
+                         solo_y=solo_y("grafico-evolucion")),
+            parche_datos(construir_grafico_detalle(resultados), revision, ejes=("xaxis", "xaxis2"),
+                         solo_y=solo_y("grafico-edos")),
+            firmas
+        )
 
+    # Los gráficos de series llegan reducidos; al hacer zoom se redibuja solo el
+    # tramo visible con todos sus puntos
     @app.callback(
+        [Output("grafico-evolucion", "figure"),
+         Output("graficos-dibujados", "data", allow_duplicate=True)],
+        Input("grafico-evolucion", "relayoutData"),
+        State("store-resultados", "data"),
+        prevent_initial_call=True
+    )
+    def zoom_evolucion(relayout, resultados):
+        rango = rango_zoom(relayout)
+        if rango is False or not resultados:
+            raise PreventUpdate
+        
+        from algoritmo import construir_grafico_evolucion
+        return construir_grafico_evolucion(resultados, rango=rango), _olvidar_trazas("grafico-evolucion")
+
+    @app.callback(
+        [Output("grafico-edos", "figure"),
+         Output("graficos-dibujados", "data", allow_duplicate=True)],
+        Input("grafico-edos", "relayoutData"),
+        [State("grafico-edos", "figure"),
+         State("store-resultados", "data")],
+        prevent_initial_call=True
+    )
+    def zoom_edos(relayout, figura, resultados):
+        rango_3, rango_7 = rango_zoom(relayout, "xaxis"), rango_zoom(relayout, "xaxis2")
+        if (rango_3 is False and rango_7 is False) or not resultados:
+            raise PreventUpdate
+        
+        # El subgráfico que no cambió conserva el rango con el que se dibujó
+        ejes = (figura or {}).get("layout", {})
+        if rango_3 is False:
+            rango_3 = ejes.get("xaxis", {}).get("range")
+        if rango_7 is False:
+            rango_7 = ejes.get("xaxis2", {}).get("range")
+        
+        from algoritmo import construir_grafico_detalle
+        return (construir_grafico_detalle(resultados, rango_3=rango_3, rango_7=rango_7),
+                _olvidar_trazas("grafico-edos"))
+
+    @app.callback(
+        Output("store-escenarios", "data"),
+        [Input("guardar-escenario", "n_clicks"),
+         Input("borrar-escenarios", "n_clicks")],
+        [State("nombre-escenario", "value"),
+         State("store-escenarios", "data"),
+         State("salario-mensual", "value"),
+         State("meses-ahorro", "value"),
+         State("tasa-crecimiento", "value"),
+         State("store-file-data", "data"),
+         State("expectativas-ingresos", "value"),
+         State("tasa-interes", "value"),
+         State("inflacion", "value"),
+         State("preferencias-temporales", "value"),
+         State("educacion-financiera", "value"),
+         State("riesgo-desempleo", "value"),
+         State("situacion-familiar", "value"),
+         State("gastos-salud", "value"),
+         State("estabilidad-laboral", "value"),
+         State("inflacion-por-categoria", "value")],
+        prevent_initial_call=True
+    )
+    def gestionar_escenarios(guardar, borrar, nombre, escenarios, salario, meses, tasa_crecimiento, file_data,
+                             expectativas_ingresos, tasa_interes, inflacion, preferencias_temporales,
+                             educacion_financiera, riesgo_desempleo, situacion_familiar, gastos_salud,
+                             estabilidad_laboral, inflacion_por_categoria):
+        if ctx.triggered_id == "borrar-escenarios":
+            return []
+        if not salario or not meses:
+            raise PreventUpdate
+        
+        from nucleo import MAX_ESCENARIOS, evaluar_escenarios, leer_gastos
+        
+        escenarios = list(escenarios or [])
+        nombre = (nombre or "").strip() or f"Escenario {len(escenarios) + 1}"
+        escenario = {
+            'nombre': nombre,
+            'salario': float(salario),
+            'meses': int(meses),
+            'tasa_crecimiento': float(tasa_crecimiento or 0),
+            'gasto': leer_gastos(file_data),
+            # Solo la clave del archivo; las categorías se leen de cache_gastos al evaluar
+            'archivo': file_data.get('clave') if isinstance(file_data, dict) else None,
+            'inflacion_por_categoria': bool(inflacion_por_categoria),
+            'variables_ahorro': {
+                'expectativas_ingresos': expectativas_ingresos,
+                'tasa_interes': tasa_interes,
+                'inflacion': inflacion,
+                'preferencias_temporales': preferencias_temporales,
+                'educacion_financiera': educacion_financiera,
+                'riesgo_desempleo': riesgo_desempleo,
+                'situacion_familiar': situacion_familiar,
+                'gastos_salud': gastos_salud,
+                'estabilidad_laboral': estabilidad_laboral
+            }
+        }
+        
+        # Un nombre repetido reemplaza al escenario anterior
+        escenarios = [e for e in escenarios if e['nombre'] != nombre] + [escenario]
+        return evaluar_escenarios(escenarios[-MAX_ESCENARIOS:])
+
+    @app.callback(
+        Output("resultado-objetivo", "children"),
+        Input("buscar-objetivo", "n_clicks"),
+        [State("saldo-objetivo", "value"),
+         State("variable-objetivo", "value"),
+         State("tasa-objetivo", "value"),
+         State("salario-mensual", "value"),
+         State("meses-ahorro", "value"),
+         State("tasa-crecimiento", "value"),
+         State("store-file-data", "data"),
+         State("expectativas-ingresos", "value"),
+         State("tasa-interes", "value"),
+         State("inflacion", "value"),
+         State("preferencias-temporales", "value"),
+         State("educacion-financiera", "value"),
+         State("riesgo-desempleo", "value"),
+         State("situacion-familiar", "value"),
+         State("gastos-salud", "value"),
+         State("estabilidad-laboral", "value"),
+         State("inflacion-por-categoria", "value")],
+        prevent_initial_call=True
+    )
+    def buscar_objetivo_ahorro(n_clicks, objetivo, variable, tasa, salario, meses, tasa_crecimiento, file_data,
+                               expectativas_ingresos, tasa_interes, inflacion, preferencias_temporales,
+                               educacion_financiera, riesgo_desempleo, situacion_familiar, gastos_salud,
+                               estabilidad_laboral, inflacion_por_categoria):
+        if not n_clicks or objetivo is None or not salario or not meses:
+            raise PreventUpdate
+        
+        from nucleo import R_3, R_7, buscar_objetivo, leer_categorias, leer_gastos
+        
+        variables_ahorro = {
+            'expectativas_ingresos': expectativas_ingresos,
+            'tasa_interes': tasa_interes,
+            'inflacion': inflacion,
+            'preferencias_temporales': preferencias_temporales,
+            'educacion_financiera': educacion_financiera,
+            'riesgo_desempleo': riesgo_desempleo,
+            'situacion_familiar': situacion_familiar,
+            'gastos_salud': gastos_salud,
+            'estabilidad_laboral': estabilidad_laboral
+        }
+        gastos_categoria = leer_categorias(file_data, inflacion) if inflacion_por_categoria else None
+        
+        try:
+            resultado = buscar_objetivo(
+                float(objetivo), variable, float(salario), leer_gastos(file_data),
+                float(tasa_crecimiento or 0), int(meses), variables_ahorro,
+                r=R_3 if tasa == 3 else R_7, gastos_categoria=gastos_categoria
+            )
+        except Exception as e:
+            print(f"Error buscando objetivo: {str(e)}")
+            return dbc.Alert(f"No se pudo buscar el objetivo: {str(e)}", color="danger")
+        
+        if resultado["valor"] is None:
+            return dbc.Alert(
+                f"El saldo objetivo de Bs. {float(objetivo):,.2f} no es alcanzable con los demás datos actuales.",
+                color="warning"
+            )
+        if variable == 'salario':
+            texto = f"Salario mínimo necesario: Bs. {resultado['valor']:,.2f}"
+        elif variable == 'gasto':
+            texto = f"Gasto mensual máximo permitido: Bs. {resultado['valor']:,.2f}"
+        else:
+            texto = f"Plazo mínimo: {resultado['valor']} meses ({resultado['valor'] / 12:.1f} años)"
+        return dbc.Alert(f"{texto} para llegar a Bs. {float(objetivo):,.2f} con el modelo EDO al {tasa}%.", color="success")
+
+    # Modo en vivo: el navegador espera ESPERA_EN_VIVO_MS sin cambios y numera la
+    # solicitud; los clics del botón toman número del mismo contador y solo se
+    # aplica la respuesta de la última solicitud (ver calcular_resultados)
+    app.clientside_callback(
+        ClientsideFunction(namespace="simulador", function_name="programar_en_vivo"),
+        Output("solicitud-en-vivo", "data"),
+        [Input("modo-en-vivo", "value"),
+         Input("store-file-data", "data")] + [Input(entrada, "value") for entrada in ENTRADAS_SIMULACION],
+        State("config-en-vivo", "data"),
+        prevent_initial_call=True
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="simulador", function_name="numerar_calculo"),
+        Output("solicitud-calculo", "data"),
+        Input("calcular-proyecciones", "n_clicks"),
+        prevent_initial_call=True
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="simulador", function_name="aplicar_resultados"),
         [Output("store-resultados", "data"),
          Output("generar-reporte", "disabled")],
-        Input("calcular-proyecciones", "n_clicks"),
+        Input("respuesta-resultados", "data"),
+        [State("solicitud-en-vivo", "data"),
+         State("solicitud-calculo", "data")],
+        prevent_initial_call=True
+    )
+
+    @app.callback(
+        Output("respuesta-resultados", "data"),
+        [Input("solicitud-calculo", "data"),
+         Input("solicitud-en-vivo", "data")],
         [State("salario-mensual", "value"),
          State("meses-ahorro", "value"),
          State("tasa-crecimiento", "value"),
@@ -473,17 +987,20 @@ def register_callbacks(app):
          State("riesgo-desempleo", "value"),
          State("situacion-familiar", "value"),
          State("gastos-salud", "value"),
-         State("estabilidad-laboral", "value")],
+         State("estabilidad-laboral", "value"),
+         State("inflacion-por-categoria", "value")],
         prevent_initial_call=True
     )
-    def calcular_resultados(n_clicks, salario, meses, tasa_crecimiento, file_data, 
+    def calcular_resultados(solicitud_calculo, solicitud_en_vivo, salario, meses, tasa_crecimiento, file_data, 
                           expectativas_ingresos, tasa_interes, inflacion, preferencias_temporales,
-                          educacion_financiera, riesgo_desempleo, situacion_familiar, gastos_salud, estabilidad_laboral):
-        if not n_clicks:
+                          educacion_financiera, riesgo_desempleo, situacion_familiar, gastos_salud, estabilidad_laboral,
+                          inflacion_por_categoria):
+        secuencia = solicitud_en_vivo if ctx.triggered_id == "solicitud-en-vivo" else solicitud_calculo
+        if not secuencia:
             raise PreventUpdate
         
         try:
-            from algoritmo import calcular_proyecciones
+            from nucleo import calcular_proyecciones
             
             variables_ahorro = {
                 'expectativas_ingresos': expectativas_ingresos,
@@ -497,12 +1014,15 @@ def register_callbacks(app):
                 'estabilidad_laboral': estabilidad_laboral
             }
             
-            resultados = calcular_proyecciones(n_clicks, salario, meses, tasa_crecimiento, file_data, variables_ahorro)
+            resultados = calcular_proyecciones(secuencia, salario, meses, tasa_crecimiento, file_data,
+                                               variables_ahorro, inflacion_por_categoria=bool(inflacion_por_categoria),
+                                               sensibilidad=True, n_sobol=MUESTRAS_SOBOL)
             
             if not resultados:
                 raise ValueError("No se obtuvieron resultados válidos")
-                
-            return resultados, False
+            
+            # La secuencia permite descartar en el navegador respuestas ya superadas
+            return {"secuencia": secuencia, "resultados": resultados}
         
         except Exception as e:
             print(f"Error al calcular resultados: {str(e)}")
@@ -0,0 +1,273 @@
+"""Latencias por etapa, tamaños de respuesta y contadores en formato Prometheus.
+
+Solo usa la biblioteca estándar, así nucleo, ingesta y cache pueden importarlo
+sin costo. Cada proceso acumula en memoria; con METRICAS_SQLITE los procesos
+(workers de gunicorn, trabajos de reporte en segundo plano) vuelcan lo suyo en
+el mismo archivo y /metrics muestra la suma de todos.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from functools import wraps
+
+RUTA_SQLITE = os.environ.get('METRICAS_SQLITE')
+INTERVALO_VOLCADO = float(os.environ.get('METRICAS_INTERVALO', 5))
+
+CUBETAS_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CUBETAS_BYTES = (1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7, 3e7)
+
+def _formato(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if valor != int(valor) else str(int(valor))
+
+def _etiquetas(etiquetas):
+    """Tupla ordenada de (nombre, valor) usada como clave de una serie"""
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _texto_etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+
+class Registro:
+    """Series de contadores e histogramas de un proceso.
+
+    Cada histograma guarda cuentas por cubeta, suma y total; al exponer se
+    convierten en las muestras acumuladas (le) de Prometheus, que se combinan
+    entre procesos sumando. Con ruta_sqlite, volcar() suma en el archivo la
+    diferencia con el volcado anterior.
+    """
+
+    def __init__(self, ruta_sqlite=None):
+        self.ruta_sqlite = ruta_sqlite
+        self._definiciones = {}
+        self._contadores = defaultdict(float)
+        self._histogramas = {}
+        self._volcado = {}
+        self._ultimo_volcado = time.monotonic()
+        self._lock = threading.Lock()
+        # Aparte de _lock, que toma _muestras_locales: serializa los volcados de los hilos
+        self._lock_volcado = threading.Lock()
+        if ruta_sqlite:
+            with self._conectar() as conexion:
+                conexion.execute("PRAGMA journal_mode=WAL")
+                conexion.execute(
+                    "CREATE TABLE IF NOT EXISTS metricas ("
+                    "muestra TEXT, etiquetas TEXT, valor REAL, PRIMARY KEY (muestra, etiquetas))"
+                )
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta_sqlite, timeout=5)
+
+    def definir(self, nombre, tipo, ayuda, cubetas=None):
+        self._definiciones[nombre] = (tipo, ayuda, tuple(cubetas) if cubetas else None)
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = (nombre, _etiquetas(etiquetas))
+        with self._lock:
+            self._contadores[clave] += valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        cubetas = self._definiciones[nombre][2]
+        clave = (nombre, _etiquetas(etiquetas))
+        indice = bisect_left(cubetas, valor)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = [[0] * (len(cubetas) + 1), 0.0, 0]
+            histograma[0][indice] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+
+    def _muestras_locales(self):
+        """{(muestra, etiquetas): valor} de este proceso"""
+        with self._lock:
+            muestras = dict(self._contadores)
+            histogramas = [(clave, list(h[0]), h[1], h[2]) for clave, h in self._histogramas.items()]
+        for (nombre, etiquetas), cuentas, suma, total in histogramas:
+            acumulado = 0
+            limites = [_formato(limite) for limite in self._definiciones[nombre][2]] + ['+Inf']
+            for limite, cuenta in zip(limites, cuentas):
+                acumulado += cuenta
+                muestras[(f"{nombre}_bucket", etiquetas + (('le', limite),))] = acumulado
+            muestras[(f"{nombre}_sum", etiquetas)] = suma
+            muestras[(f"{nombre}_count", etiquetas)] = total
+        return muestras
+
+    def volcar(self, forzar=False):
+        """Suma en SQLite lo observado desde el último volcado.
+
+        Sin forzar, vuelca como mucho cada INTERVALO_VOLCADO segundos.
+        """
+        if not self.ruta_sqlite:
+            return
+        # Dos hilos que vuelcan a la vez sumarían dos veces la misma diferencia
+        with self._lock_volcado:
+            if not forzar and time.monotonic() - self._ultimo_volcado < INTERVALO_VOLCADO:
+                return
+            self._ultimo_volcado = time.monotonic()
+            muestras = self._muestras_locales()
+            diferencias = [
+                (muestra, json.dumps(etiquetas), valor - self._volcado.get((muestra, etiquetas), 0))
+                for (muestra, etiquetas), valor in muestras.items()
+                if valor != self._volcado.get((muestra, etiquetas), 0) or (muestra, etiquetas) not in self._volcado
+            ]
+            if not diferencias:
+                return
+            try:
+                with self._conectar() as conexion:
+                    conexion.executemany(
+                        "INSERT INTO metricas (muestra, etiquetas, valor) VALUES (?, ?, ?) "
+                        "ON CONFLICT (muestra, etiquetas) DO UPDATE SET valor = valor + excluded.valor",
+                        diferencias
+                    )
+                self._volcado = muestras
+            except sqlite3.Error as e:
+                print(f"Error volcando métricas en SQLite: {str(e)}")
+
+    def _series(self):
+        if not self.ruta_sqlite:
+            return self._muestras_locales()
+        self.volcar(forzar=True)
+        try:
+            with self._conectar() as conexion:
+                filas = conexion.execute("SELECT muestra, etiquetas, valor FROM metricas").fetchall()
+        except sqlite3.Error as e:
+            print(f"Error leyendo métricas de SQLite: {str(e)}")
+            return self._muestras_locales()
+        return {(muestra, tuple(tuple(e) for e in json.loads(etiquetas))): valor for muestra, etiquetas, valor in filas}
+
+    def exponer(self):
+        """Texto en el formato de exposición de Prometheus (version 0.0.4)"""
+        por_metrica = defaultdict(list)
+        for (muestra, etiquetas), valor in self._series().items():
+            nombre = muestra
+            for sufijo in ('_bucket', '_sum', '_count'):
+                base = muestra[:-len(sufijo)]
+                if muestra.endswith(sufijo) and self._definiciones.get(base, ('',))[0] == 'histogram':
+                    nombre = base
+            por_metrica[nombre].append((muestra, etiquetas, valor))
+
+        def orden(serie):
+            muestra, etiquetas, _ = serie
+            sin_le = tuple(e for e in etiquetas if e[0] != 'le')
+            le = dict(etiquetas).get('le')
+            return (sin_le, muestra, float('inf') if le in (None, '+Inf') else float(le))
+
+        lineas = []
+        for nombre in sorted(por_metrica):
+            tipo, ayuda, _ = self._definiciones.get(nombre, ('untyped', '', None))
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for muestra, etiquetas, valor in sorted(por_metrica[nombre], key=orden):
+                lineas.append(f"{muestra}{_texto_etiquetas(etiquetas)} {_formato(valor)}")
+        return '\n'.join(lineas) + '\n'
+
+registro = Registro(ruta_sqlite=RUTA_SQLITE)
+
+registro.definir('simulador_etapa_segundos', 'histogram',
+                 "Duración de cada etapa del cálculo, los gráficos y el reporte", CUBETAS_SEGUNDOS)
+registro.definir('simulador_solicitud_segundos', 'histogram',
+                 "Duración de las solicitudes HTTP por ruta y callback", CUBETAS_SEGUNDOS)
+registro.definir('simulador_respuesta_bytes', 'histogram',
+                 "Tamaño del cuerpo de las respuestas HTTP por ruta y callback", CUBETAS_BYTES)
+registro.definir('simulador_solicitud_bytes', 'histogram',
+                 "Tamaño del cuerpo de las solicitudes HTTP por ruta y callback", CUBETAS_BYTES)
+registro.definir('simulador_cache_consultas_total', 'counter',
+                 "Consultas a cada cache por resultado (acierto o fallo)")
+registro.definir('simulador_errores_total', 'counter', "Errores capturados por etapa")
+
+class medir:
+    """Registra la duración de una etapa como contexto o decorador.
+
+        with medir("solucion_edo", solver="odeint"):
+            ...
+
+        @medir("figura", grafico="evolucion")
+        def construir_grafico_evolucion(...):
+    """
+
+    def __init__(self, etapa, **etiquetas):
+        self.etapa = etapa
+        self.etiquetas = dict(etiquetas, etapa=etapa)
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        registro.observar('simulador_etapa_segundos', time.perf_counter() - self._inicio, **self.etiquetas)
+        if tipo is not None:
+            contar_error(self.etapa)
+        return False
+
+    def __call__(self, funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            # Un contexto nuevo por llamada, así las llamadas concurrentes no comparten el inicio
+            with medir(**self.etiquetas):
+                return funcion(*args, **kwargs)
+        return envoltura
+
+def observar_etapa(etapa, segundos, **etiquetas):
+    """Registra una duración medida en otro lugar (p. ej. en un proceso del pool)"""
+    registro.observar('simulador_etapa_segundos', segundos, etapa=etapa, **etiquetas)
+
+def contar_cache(cache, acierto):
+    registro.incrementar('simulador_cache_consultas_total', cache=cache, resultado='acierto' if acierto else 'fallo')
+
+def contar_error(etapa):
+    registro.incrementar('simulador_errores_total', etapa=etapa)
+
+def _ruta_actual(request, callbacks):
+    ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    if ruta.endswith('_dash-update-component'):
+        # Un callback de Dash se identifica por sus salidas, sin el sufijo @hash de allow_duplicate.
+        # Solo los registrados en la app: el cuerpo lo arma el cliente y no debe crear series nuevas
+        datos = request.get_json(silent=True) or {}
+        salida = datos.get('output')
+        if not isinstance(salida, str) or salida not in callbacks:
+            return ruta, 'otro'
+        callback = '...'.join(parte.split('@')[0] for parte in salida.strip('.').split('...'))
+        return ruta, callback
+    return ruta, ''
+
+def registrar_metricas(server, callbacks):
+    """Mide cada solicitud del servidor Flask y agrega GET /metrics.
+
+    callbacks es el callback_map de la app de Dash, para etiquetar cada
+    solicitud a _dash-update-component con su callback.
+    """
+    from flask import Response, g, request
+
+    @server.before_request
+    def iniciar_medicion():
+        g.inicio_metricas = time.perf_counter()
+
+    @server.after_request
+    def registrar_solicitud(response):
+        inicio = g.pop('inicio_metricas', None)
+        if inicio is None or request.path == '/metrics':
+            return response
+        ruta, callback = _ruta_actual(request, callbacks)
+        etiquetas = {'ruta': ruta, 'callback': callback}
+        registro.observar('simulador_solicitud_segundos', time.perf_counter() - inicio, **etiquetas)
+        if request.content_length:
+            registro.observar('simulador_solicitud_bytes', request.content_length, **etiquetas)
+        # Las respuestas en streaming (NDJSON) no tienen largo conocido
+        if not response.direct_passthrough and not response.is_streamed:
+            registro.observar('simulador_respuesta_bytes', response.calculate_content_length() or 0, **etiquetas)
+        registro.volcar()
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(registro.exponer(), mimetype='text/plain; version=0.0.4; charset=utf-8')
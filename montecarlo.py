@@ -0,0 +1,156 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from nucleo import AFP_TASA, C2, R_7, calcular_factor_ahorro
+
+# Parámetros estocásticos
+VOLATILIDAD_CRECIMIENTO = 1.0  # desvío del crecimiento salarial (% anual)
+VOLATILIDAD_TASA = 0.01  # desvío de la tasa de interés (anual)
+PROB_DESEMPLEO_MENSUAL = 0.01  # probabilidad de perder el empleo con variables neutrales
+ELASTICIDAD_DESEMPLEO = 4  # sensibilidad de la probabilidad a riesgo/estabilidad
+DURACION_DESEMPLEO = 6  # meses promedio sin empleo
+TAMANO_BLOQUE = 10000
+PERCENTILES = (5, 50, 95)
+CUBETAS = 4096  # cubetas del histograma mensual de saldos de cada bloque
+TRAYECTORIAS_PILOTO = 2000  # trayectorias para fijar el rango de los histogramas
+MARGEN_BORDES = 0.25  # ampliación del rango piloto, en fracción de su ancho
+
+def probabilidad_desempleo(variables_ahorro):
+    """Probabilidad mensual de desempleo según riesgo de desempleo y estabilidad laboral"""
+    riesgo = variables_ahorro.get('riesgo_desempleo', 1.0)
+    estabilidad = variables_ahorro.get('estabilidad_laboral', 1.0)
+    p = PROB_DESEMPLEO_MENSUAL * (riesgo * estabilidad) ** ELASTICIDAD_DESEMPLEO
+    return min(max(p, 0.0), 1.0)
+
+def _saldos(rng, n, meses, ahorro_mensual, gasto, gI, r, factor_ahorro, p_desempleo):
+    """Genera los saldos de n trayectorias mes a mes, del mes 0 al mes meses"""
+    sigma_g = (VOLATILIDAD_CRECIMIENTO / 100) / 12
+    sigma_r = VOLATILIDAD_TASA / 12
+    p_reempleo = 1 / DURACION_DESEMPLEO
+
+    A = np.zeros(n)
+    log_indice = np.zeros(n)
+    desempleado = np.zeros(n, dtype=bool)
+    yield A
+
+    for _ in range(meses):
+        # El factor de ajuste afecta solo al ahorro del ingreso; sin empleo se paga el gasto completo
+        aporte = np.where(
+            desempleado,
+            -gasto,
+            ahorro_mensual * np.exp(log_indice) / factor_ahorro
+        )
+        r_m = r + sigma_r * rng.standard_normal(n)
+        A = A * np.exp(C2 + r_m) + aporte
+        yield A
+
+        log_indice += np.where(desempleado, 0.0, gI + sigma_g * rng.standard_normal(n))
+        sorteo = rng.random(n)
+        desempleado = np.where(desempleado, sorteo >= p_reempleo, sorteo < p_desempleo)
+
+def _bordes(semilla, parametros):
+    """Bordes comunes de los histogramas por mes, forma (meses + 1, CUBETAS + 1).
+
+    Salen del rango de una corrida piloto de TRAYECTORIAS_PILOTO trayectorias,
+    ampliado MARGEN_BORDES de cada lado; lo que cae afuera va a las cubetas
+    extremas, que se acotan con el mínimo y el máximo reales.
+    """
+    rng = np.random.default_rng(semilla)
+    rangos = np.array([(A.min(), A.max()) for A in _saldos(rng, TRAYECTORIAS_PILOTO, *parametros)])
+    ancho = np.maximum(rangos[:, 1] - rangos[:, 0], 1.0)
+    bajo = rangos[:, 0] - MARGEN_BORDES * ancho
+    alto = rangos[:, 1] + MARGEN_BORDES * ancho
+    return bajo[:, np.newaxis] + (alto - bajo)[:, np.newaxis] * np.linspace(0, 1, CUBETAS + 1)
+
+def _simular_bloque(tarea):
+    """Simula un bloque de trayectorias y devuelve su resumen mensual combinable.
+
+    Devuelve (conteos, minimos, maximos): conteos tiene forma (meses + 1, CUBETAS + 2)
+    con las cubetas de bordes más una por debajo y otra por encima. Se ejecuta en
+    los procesos del pool, por eso recibe una tupla y no usa estado global.
+    """
+    semilla, n, bordes, parametros = tarea
+    rng = np.random.default_rng(semilla)
+
+    conteos = np.zeros((bordes.shape[0], CUBETAS + 2), dtype=np.int64)
+    minimos = np.empty(bordes.shape[0])
+    maximos = np.empty(bordes.shape[0])
+    for m, A in enumerate(_saldos(rng, n, *parametros)):
+        conteos[m] = np.bincount(np.searchsorted(bordes[m], A, side='right'), minlength=CUBETAS + 2)
+        minimos[m] = A.min()
+        maximos[m] = A.max()
+    return conteos, minimos, maximos
+
+def _percentiles(conteos, minimos, maximos, bordes):
+    """Percentiles PERCENTILES por mes a partir de los histogramas combinados.
+
+    Interpola dentro de cada cubeta como np.percentile (método lineal) entre
+    muestras ordenadas; las cubetas extremas van del mínimo o hasta el máximo.
+    """
+    resultado = np.empty((len(PERCENTILES), conteos.shape[0]))
+    total = conteos[0].sum()
+    for m in range(conteos.shape[0]):
+        limites = np.concatenate(([minimos[m]], bordes[m], [maximos[m]]))
+        limites = np.clip(limites, minimos[m], maximos[m])
+        acumulado = np.cumsum(conteos[m])
+        for i, p in enumerate(PERCENTILES):
+            rango = p / 100 * (total - 1)
+            cubeta = int(np.searchsorted(acumulado, rango, side='right'))
+            previos = acumulado[cubeta - 1] if cubeta else 0
+            fraccion = (rango - previos + 0.5) / conteos[m, cubeta]
+            resultado[i, m] = limites[cubeta] + min(fraccion, 1.0) * (limites[cubeta + 1] - limites[cubeta])
+    return resultado
+
+def simular_montecarlo(salario, gasto, tasa_crecimiento, meses, variables_ahorro, r=R_7,
+                       n_trayectorias=10000, workers=None, semilla=None, tamano_bloque=TAMANO_BLOQUE):
+    """Simulación Monte Carlo del ahorro con crecimiento, tasa y desempleo aleatorios.
+
+    Las trayectorias se simulan en bloques vectorizados repartidos en un
+    ProcessPoolExecutor (workers=1 las simula en el proceso actual). Cada bloque
+    devuelve solo un histograma por mes sobre bordes comunes (ver _bordes), que
+    se suman a medida que llegan, así la memoria no crece con n_trayectorias;
+    los percentiles quedan con la resolución de una cubeta. Con la misma
+    semilla el resultado no depende de la cantidad de workers.
+    """
+    if n_trayectorias < 1:
+        raise ValueError("n_trayectorias debe ser al menos 1")
+    
+    I0 = salario * (1 - AFP_TASA)
+    ahorro_mensual = I0 - gasto
+    gI = (tasa_crecimiento / 100) / 12
+    factor_ahorro = calcular_factor_ahorro(variables_ahorro)
+    p_desempleo = probabilidad_desempleo(variables_ahorro)
+    parametros = (meses, ahorro_mensual, gasto, gI, r, factor_ahorro, p_desempleo)
+
+    tamanos = [min(tamano_bloque, n_trayectorias - inicio) for inicio in range(0, n_trayectorias, tamano_bloque)]
+    semilla_piloto, *semillas = np.random.SeedSequence(semilla).spawn(len(tamanos) + 1)
+    bordes = _bordes(semilla_piloto, parametros)
+    tareas = [(s, n, bordes, parametros) for s, n in zip(semillas, tamanos)]
+
+    conteos = np.zeros((meses + 1, CUBETAS + 2), dtype=np.int64)
+    minimos = np.full(meses + 1, np.inf)
+    maximos = np.full(meses + 1, -np.inf)
+
+    def combinar(bloques):
+        for conteos_bloque, minimos_bloque, maximos_bloque in bloques:
+            conteos[:] += conteos_bloque
+            np.minimum(minimos, minimos_bloque, out=minimos)
+            np.maximum(maximos, maximos_bloque, out=maximos)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tareas) == 1:
+        combinar(_simular_bloque(tarea) for tarea in tareas)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tareas))) as executor:
+            combinar(executor.map(_simular_bloque, tareas))
+
+    combinado = _percentiles(conteos, minimos, maximos, bordes)
+
+    return {
+        "t": np.arange(meses + 1),
+        "p5": combinado[0],
+        "p50": combinado[1],
+        "p95": combinado[2],
+        "n_trayectorias": n_trayectorias,
+        "prob_desempleo": p_desempleo
+    }
@@ -0,0 +1,555 @@
+# Núcleo numérico del simulador: modelo EDO, solvers y cálculos por lote.
+# No importa Dash ni Plotly; scipy y pandas se cargan solo en las funciones que
+# los usan, así los procesos por lotes (cli.py) arrancan rápido.
+import numpy as np
+from cache import cache_resultados, generar_clave, memoizar
+from metricas import contar_error, medir
+
+# Constantes
+AFP_TASA = 0.1271
+C2 = 0.01
+R_3 = 0.03 / 12
+R_7 = 0.07 / 12
+MESES_MAX_OBJETIVO = 1200
+MAX_ESCENARIOS = 50
+
+@medir("agregacion_gastos")
+def leer_gastos(file_data):
+    """Gasto mensual total a partir de store-file-data.
+
+    Acepta el resumen que genera ingesta.procesar_archivo o, por compatibilidad,
+    el DataFrame serializado en JSON (orient='split').
+    """
+    if not file_data:
+        return 0
+    
+    if isinstance(file_data, dict):
+        gasto = float(file_data.get('gasto_total', 0))
+        return gasto if gasto >= 0 else 0
+    
+    try:
+        import io
+        import pandas as pd
+        df = pd.read_json(io.StringIO(file_data), orient='split')
+        if 'Gasto mensual estimado' in df.columns:
+            gasto = float(df['Gasto mensual estimado'].sum())
+            return gasto if gasto >= 0 else 0
+        return 0
+    except Exception as e:
+        print(f"Error procesando archivo: {str(e)}")
+        contar_error("agregacion_gastos")
+        return 0
+
+# Inflación anual (%) asociada a cada nivel del selector "inflacion"
+INFLACION_POR_NIVEL = {
+    0.95: 1.5,
+    1.0: 3.0,
+    1.05: 5.0,
+    1.1: 8.0,
+    1.15: 12.0
+}
+
+def inflacion_anual(nivel):
+    """Inflación anual (%) para un nivel del selector, interpolando entre niveles"""
+    niveles = sorted(INFLACION_POR_NIVEL)
+    return np.interp(nivel, niveles, [INFLACION_POR_NIVEL[n] for n in niveles])
+
+@medir("agregacion_gastos")
+def leer_categorias(file_data, inflacion=1.0):
+    """Montos y tasas mensuales de crecimiento de cada categoría de gasto.
+
+    Cada categoría usa su inflación anual del archivo y, si no la trae, la del
+    nivel de inflación elegido. store-file-data solo trae la clave del archivo y
+    las filas se leen de ingesta.cache_gastos; la API puede mandar el detalle en
+    línea en 'categorias'. Devuelve None si no hay detalle por categoría (p. ej.
+    el formato JSON anterior o un archivo que ya salió de la cache).
+    """
+    if not isinstance(file_data, dict):
+        return None
+    
+    if file_data.get('categorias'):
+        categorias = file_data['categorias']
+        montos = np.asarray(categorias['montos'], dtype=float)
+        anual = np.asarray([np.nan if x is None else x for x in categorias['inflacion']], dtype=float)
+    elif file_data.get('clave'):
+        from ingesta import obtener_gastos
+        gastos = obtener_gastos(file_data['clave'])
+        if gastos is None:
+            print("Gastos por categoría fuera de cache; se usa el gasto total")
+            return None
+        montos, anual = gastos[:, 0], gastos[:, 1]
+    else:
+        return None
+    anual = np.where(np.isnan(anual), inflacion_anual(inflacion), anual)
+    return montos, (anual / 100) / 12
+
+def agrupar_categorias(montos, tasas):
+    """Suma los montos de categorías con la misma tasa; el modelo es lineal en el gasto"""
+    tasas_unicas, indices = np.unique(np.asarray(tasas, dtype=float), return_inverse=True)
+    return np.bincount(indices, weights=np.asarray(montos, dtype=float)), tasas_unicas
+
+def matriz_gastos(montos, tasas, t):
+    """Gasto de cada categoría en cada mes, forma (categorías, meses)"""
+    montos = np.asarray(montos, dtype=float)
+    tasas = np.asarray(tasas, dtype=float)
+    return montos[:, np.newaxis] * np.exp(tasas[:, np.newaxis] * np.asarray(t, dtype=float)[np.newaxis, :])
+
+PESOS_FACTOR = {
+    'expectativas_ingresos': 0.15,
+    'tasa_interes': 0.1,
+    'inflacion': 0.2,
+    'preferencias_temporales': 0.15,
+    'educacion_financiera': 0.1,
+    'riesgo_desempleo': 0.1,
+    'situacion_familiar': 0.1,
+    'gastos_salud': 0.05,
+    'estabilidad_laboral': 0.05
+}
+
+def calcular_factor_ahorro(variables):
+    """Calcula un factor de ajuste basado en las variables que afectan al ahorro.
+
+    Los valores pueden ser escalares o arreglos de NumPy del mismo largo.
+    """
+    factor = 1.0
+    for nombre, peso in PESOS_FACTOR.items():
+        factor = factor * variables.get(nombre, 1.0) ** peso
+    return factor
+
+def construir_modelo(ahorro_mensual, gI, r, factor_ahorro, gastos_categoria=None):
+    """Lado derecho de la EDO para odeint.
+
+    Con gastos_categoria=(montos, tasas) ahorro_mensual es el ingreso neto y a él
+    se resta en cada t el gasto de cada categoría creciendo a su propia tasa.
+    """
+    if gastos_categoria is not None:
+        montos, tasas = agrupar_categorias(*gastos_categoria)
+    
+    def modelo(A, t):
+        ahorro_t = ahorro_mensual * np.exp(gI * t)
+        if gastos_categoria is not None:
+            ahorro_t = ahorro_t - montos @ np.exp(tasas * t)
+        return ahorro_t * (1 / factor_ahorro) + (C2 + r) * A
+    return modelo
+
+def solucion_analitica(t, ahorro_mensual, gI, r, factor_ahorro):
+    """Solución cerrada de dA/dt = ahorro*e^(gI t)/factor + (C2 + r)A con A(0) = 0.
+
+    A(t) = ahorro/factor * (e^(gI t) - e^(k t)) / (gI - k), con k = C2 + r.
+    Se evalúa como ahorro/factor * t * e^(k t) * expm1(d t)/(d t), d = gI - k,
+    que es estable cuando gI se acerca a k (el límite es ahorro/factor * t * e^(k t)).
+    """
+    k = C2 + r
+    d = gI - k
+    x = d * t
+    x_seguro = np.where(x == 0, 1.0, x)
+    fase = np.where(x == 0, 1.0, np.expm1(x_seguro) / x_seguro)
+    return (ahorro_mensual / factor_ahorro) * t * np.exp(k * t) * fase
+
+def saldo_analitico(t, ahorro_mensual, gI, r, factor_ahorro, gastos_categoria=None):
+    """Solución cerrada en los tiempos t, opcionalmente con gastos por categoría.
+
+    Con gastos_categoria=(montos, tasas) ahorro_mensual es el ingreso neto; como el
+    modelo es lineal, la solución es la del ingreso menos la de cada grupo de
+    categorías con igual tasa, así el costo depende de las tasas distintas y no de
+    la cantidad de categorías. gI, r y factor_ahorro pueden ser arreglos de forma
+    (n, 1) para resolver n casos a la vez sobre t.
+    """
+    A = solucion_analitica(t, ahorro_mensual, gI, r, factor_ahorro)
+    if gastos_categoria is not None:
+        montos_grupo, tasas_grupo = agrupar_categorias(*gastos_categoria)
+        # (..., grupos, meses) contraído contra los montos de cada grupo
+        nucleo = solucion_analitica(np.asarray(t)[..., np.newaxis, :], 1.0, tasas_grupo[:, np.newaxis],
+                                    np.asarray(r)[..., np.newaxis, :], np.asarray(factor_ahorro)[..., np.newaxis, :])
+        A = A - np.einsum('g,...gm->...m', montos_grupo, nucleo)
+    return A
+
+def serie_uniforme(pago, r, t):
+    """Valor acumulado de pagos constantes con interés compuesto mensual r en los meses t (vectorizado)"""
+    t = np.asarray(t, dtype=float)
+    if r == 0:
+        return pago * t
+    return pago * np.expm1(t * np.log1p(r)) / r
+
+def verificar_solver_analitico(salario, gasto, tasa_crecimiento, meses, variables_ahorro, rtol=1e-6,
+                               gastos_categoria=None):
+    """Compara el solver analítico contra odeint; devuelve (coincide, error_relativo_maximo)"""
+    _, A_3_ode, A_7_ode, *_ = resolver_EDO(salario, gasto, tasa_crecimiento, meses, variables_ahorro,
+                                           solver="odeint", gastos_categoria=gastos_categoria)
+    _, A_3_ana, A_7_ana, *_ = resolver_EDO(salario, gasto, tasa_crecimiento, meses, variables_ahorro,
+                                           solver="analytic", gastos_categoria=gastos_categoria)
+    
+    referencia = np.maximum(np.abs(np.concatenate([A_3_ode, A_7_ode])), 1.0)
+    diferencia = np.abs(np.concatenate([A_3_ana - A_3_ode, A_7_ana - A_7_ode]))
+    error = float(np.max(diferencia / referencia)) if referencia.size else 0.0
+    return error <= rtol, error
+
+def resolver_EDO_lote(salario, gasto, tasa_crecimiento, meses, variables_ahorro, tasas,
+                      tasas_crecimiento=None, factores_ahorro=None, solver="analytic",
+                      gastos_categoria=None):
+    """Resuelve el modelo para varias tasas de interés en una sola pasada vectorizada.
+
+    tasas son tasas mensuales (como R_3 y R_7); tasas_crecimiento (% anual) y
+    factores_ahorro son opcionales y se difunden contra tasas. Devuelve t y una
+    matriz de forma (n_tasas, meses).
+
+    Sin gastos_categoria el ahorro neto crece con el salario. Con
+    gastos_categoria=(montos, tasas_mensuales) el ingreso crece con el salario y
+    cada gasto con su tasa (ver saldo_analitico).
+    """
+    I0 = salario * (1 - AFP_TASA)
+    ahorro_mensual = I0 - gasto if gastos_categoria is None else I0
+    t = np.linspace(0, meses, meses)
+    
+    if tasas_crecimiento is None:
+        tasas_crecimiento = tasa_crecimiento
+    if factores_ahorro is None:
+        factores_ahorro = calcular_factor_ahorro(variables_ahorro)
+    
+    r, crecimiento, factor = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(tasas, dtype=float)),
+        np.atleast_1d(np.asarray(tasas_crecimiento, dtype=float)),
+        np.atleast_1d(np.asarray(factores_ahorro, dtype=float))
+    )
+    gI = (crecimiento / 100) / 12
+    
+    if solver == "analytic":
+        with medir("solucion_edo", solver=solver):
+            A = saldo_analitico(t[np.newaxis, :], ahorro_mensual, gI[:, np.newaxis],
+                                r[:, np.newaxis], factor[:, np.newaxis], gastos_categoria)
+    elif solver == "odeint":
+        from scipy.integrate import odeint
+        with medir("solucion_edo", solver=solver):
+            A0 = np.zeros(r.shape[0])
+            A = odeint(construir_modelo(ahorro_mensual, gI, r, factor, gastos_categoria), A0, t).T
+    else:
+        raise ValueError(f"Solver desconocido: {solver}")
+    
+    return t, A
+
+@memoizar(cache_resultados)
+def resolver_EDO(salario, gasto, tasa_crecimiento, meses, variables_ahorro, solver="odeint",
+                 gastos_categoria=None):
+    if gastos_categoria is not None:
+        gasto = float(np.sum(gastos_categoria[0]))
+    I0 = salario * (1 - AFP_TASA)
+    ahorro_mensual = I0 - gasto
+    factor_ahorro = calcular_factor_ahorro(variables_ahorro)
+    
+    t, A = resolver_EDO_lote(salario, gasto, tasa_crecimiento, meses, variables_ahorro,
+                             [R_3, R_7], factores_ahorro=factor_ahorro, solver=solver,
+                             gastos_categoria=gastos_categoria)
+    A_3, A_7 = A[0], A[1]
+    
+    return t, A_3, A_7, I0, factor_ahorro, ahorro_mensual, gasto
+
+def buscar_objetivo(objetivo, variable, salario, gasto, tasa_crecimiento, meses, variables_ahorro, r=R_7,
+                    gastos_categoria=None, meses_max=MESES_MAX_OBJETIVO):
+    """Busca el valor de una entrada con el que el saldo final EDO llega a objetivo.
+
+    variable es 'salario' (salario mínimo), 'gasto' (gasto mensual máximo) o 'meses'
+    (plazo mínimo). El saldo es afín en el salario y en el gasto, así que esos dos
+    salen de dos evaluaciones de la solución cerrada; con gastos por categoría el
+    gasto se escala en la misma proporción en todas. Para los meses se evalúan
+    todos los plazos hasta meses_max de una vez, se toma el primer cruce y se
+    refina con brentq. Devuelve un dict con el valor (None si no es alcanzable).
+    """
+    I0 = salario * (1 - AFP_TASA)
+    gI = np.array([[(tasa_crecimiento / 100) / 12]])
+    tasa = np.array([[r]])
+    factor = np.array([[calcular_factor_ahorro(variables_ahorro)]])
+    if gastos_categoria is not None:
+        gasto = float(np.sum(gastos_categoria[0]))
+        if gasto <= 0:
+            gastos_categoria = None
+    
+    def saldo(t, ingreso=I0, gasto_mensual=gasto):
+        t = np.atleast_2d(np.asarray(t, dtype=float))
+        if gastos_categoria is None:
+            return saldo_analitico(t, ingreso - gasto_mensual, gI, tasa, factor)[0]
+        escala = gasto_mensual / gasto
+        categorias = (escala * np.asarray(gastos_categoria[0], dtype=float), gastos_categoria[1])
+        return saldo_analitico(t, ingreso, gI, tasa, factor, categorias)[0]
+    
+    resultado = {"variable": variable, "objetivo": float(objetivo), "valor": None}
+    
+    if variable == 'salario':
+        base = saldo([meses], ingreso=0.0)[-1]
+        pendiente = saldo([meses], ingreso=1 - AFP_TASA)[-1] - base
+        resultado["valor"] = max(float((objetivo - base) / pendiente), 0.0)
+    elif variable == 'gasto':
+        sin_gasto = saldo([meses], gasto_mensual=0.0)[-1]
+        if sin_gasto >= objetivo:
+            # Lo que resta del saldo final cada Bs. de gasto mensual
+            por_unidad = sin_gasto - saldo([meses], gasto_mensual=1.0)[-1]
+            resultado["valor"] = float((sin_gasto - objetivo) / por_unidad)
+    elif variable == 'meses':
+        plazos = np.arange(1, meses_max + 1, dtype=float)
+        saldos = saldo(plazos)
+        alcanzados = np.flatnonzero(saldos >= objetivo)
+        if alcanzados.size:
+            indice = alcanzados[0]
+            if indice == 0:
+                exacto = plazos[0]
+            else:
+                from scipy.optimize import brentq
+                exacto = brentq(lambda x: saldo([x])[-1] - objetivo, plazos[indice - 1], plazos[indice])
+            resultado["valor"] = int(plazos[indice])
+            resultado["meses_exactos"] = float(exacto)
+    else:
+        raise ValueError(f"Variable de búsqueda desconocida: {variable}")
+    
+    return resultado
+
+def simular_poblacion(df, meses=120, trayectorias=False, tamano_bloque=5000):
+    """Simula el modelo EDO para muchos perfiles a la vez.
+
+    df tiene una fila por persona con las columnas 'salario' y, opcionalmente,
+    'gasto', 'tasa_crecimiento' y cualquiera de las variables de PESOS_FACTOR
+    (los faltantes valen 0 o 1.0). Se procesa por bloques de tamano_bloque filas
+    para acotar la memoria. Devuelve un DataFrame con los saldos finales y, si
+    trayectorias es True, también un dict con t y las matrices (personas, meses).
+    """
+    import pandas as pd
+    
+    n = len(df)
+    
+    def columna(nombre, defecto):
+        if nombre in df.columns:
+            return df[nombre].fillna(defecto).to_numpy(dtype=float)
+        return np.full(n, defecto, dtype=float)
+    
+    salario = columna('salario', 0.0)
+    gasto = columna('gasto', 0.0)
+    gI = (columna('tasa_crecimiento', 0.0) / 100) / 12
+    variables = {nombre: columna(nombre, 1.0) for nombre in PESOS_FACTOR}
+    
+    I0 = salario * (1 - AFP_TASA)
+    ahorro_mensual = I0 - gasto
+    factor_ahorro = calcular_factor_ahorro(variables)
+    
+    t = np.linspace(0, meses, meses)
+    t_eval = t if trayectorias else t[-1:]
+    
+    finales = {"edo_3": np.empty(n), "edo_7": np.empty(n)}
+    series = {"edo_3": np.empty((n, len(t))), "edo_7": np.empty((n, len(t)))} if trayectorias else None
+    
+    for inicio in range(0, n, tamano_bloque):
+        bloque = slice(inicio, min(inicio + tamano_bloque, n))
+        for nombre, r in (("edo_3", R_3), ("edo_7", R_7)):
+            A = solucion_analitica(t_eval[np.newaxis, :],
+                                   ahorro_mensual[bloque, np.newaxis],
+                                   gI[bloque, np.newaxis],
+                                   r,
+                                   factor_ahorro[bloque, np.newaxis])
+            finales[nombre][bloque] = A[:, -1]
+            if trayectorias:
+                series[nombre][bloque] = A
+    
+    resumen = pd.DataFrame({
+        "ingreso_neto": I0,
+        "ahorro_mensual": ahorro_mensual,
+        "factor_ahorro": factor_ahorro,
+        "edo_3": finales["edo_3"],
+        "edo_7": finales["edo_7"]
+    }, index=df.index)
+    
+    if trayectorias:
+        return resumen, {"t": t, **series}
+    return resumen
+
+def simular_perfiles(df, meses=120, tamano_bloque=5000):
+    """simular_poblacion para perfiles con plazos distintos.
+
+    Si df tiene una columna 'meses' se resuelve un lote por cada plazo (las filas
+    sin plazo usan meses); el resultado conserva el índice y el orden de df.
+    """
+    import pandas as pd
+    
+    if 'meses' in df.columns:
+        plazos = df['meses'].fillna(meses).astype(int)
+    else:
+        plazos = pd.Series(meses, index=df.index)
+    partes = [
+        simular_poblacion(df.loc[grupo.index], meses=int(plazo), tamano_bloque=tamano_bloque)
+        for plazo, grupo in plazos.groupby(plazos)
+    ]
+    if not partes:
+        return simular_poblacion(df, meses=meses)
+    return pd.concat(partes).loc[df.index]
+
+def _entradas_escenario(escenario):
+    """Entradas que determinan el resultado de un escenario (sin nombre ni resultado)"""
+    return {k: v for k, v in escenario.items() if k not in ('nombre', 'clave', 'resultado')}
+
+def evaluar_escenarios(escenarios):
+    """Evalúa una lista de escenarios guardados y devuelve la lista con su resultado.
+
+    Cada escenario es un dict con nombre, salario, meses, tasa_crecimiento, gasto,
+    variables_ahorro y, si aplica, archivo (la clave de store-file-data). Los que
+    conservan su 'clave' (hash de las entradas) y ya traen 'resultado' se
+    reutilizan; el resto se resuelve en un solo lote sobre una grilla común de
+    meses, un grupo por cada juego de categorías e inflación distinto.
+    """
+    escenarios = [dict(e) for e in escenarios[:MAX_ESCENARIOS]]
+    for escenario in escenarios:
+        clave = generar_clave(_entradas_escenario(escenario))
+        if escenario.get('clave') != clave:
+            escenario['clave'] = clave
+            escenario.pop('resultado', None)
+    
+    pendientes = [e for e in escenarios if 'resultado' not in e]
+    if not pendientes:
+        return escenarios
+    
+    salario = np.array([float(e['salario']) for e in pendientes])
+    meses = np.array([int(e['meses']) for e in pendientes])
+    gasto = np.array([float(e.get('gasto') or 0) for e in pendientes])
+    gI = np.array([(float(e.get('tasa_crecimiento') or 0) / 100) / 12 for e in pendientes])
+    variables = {
+        nombre: np.array([float(e['variables_ahorro'].get(nombre) or 1.0) for e in pendientes])
+        for nombre in PESOS_FACTOR
+    }
+    factor = calcular_factor_ahorro(variables)
+    I0 = salario * (1 - AFP_TASA)
+    t = np.arange(meses.max() + 1, dtype=float)
+    
+    grupos = {}
+    for i, escenario in enumerate(pendientes):
+        gastos_categoria = None
+        if escenario.get('inflacion_por_categoria'):
+            gastos_categoria = leer_categorias({'clave': escenario.get('archivo')}, variables['inflacion'][i])
+        clave_grupo = generar_clave(gastos_categoria) if gastos_categoria is not None else None
+        grupos.setdefault(clave_grupo, (gastos_categoria, []))[1].append(i)
+    
+    saldos = {r: np.empty((len(pendientes), t.size)) for r in (R_3, R_7)}
+    for gastos_categoria, indices in grupos.values():
+        filas = np.asarray(indices)
+        ahorro = I0[filas] if gastos_categoria is not None else I0[filas] - gasto[filas]
+        for r in (R_3, R_7):
+            saldos[r][filas] = saldo_analitico(t[np.newaxis, :], ahorro[:, np.newaxis], gI[filas, np.newaxis],
+                                               np.full((filas.size, 1), r), factor[filas, np.newaxis],
+                                               gastos_categoria)
+    
+    # Igual que calcular_proyecciones: con ahorro negativo el saldo EDO final se marca con -1
+    negativos = I0 - gasto < 0
+    for r in (R_3, R_7):
+        saldos[r][negativos, meses[negativos]] = -1
+    
+    for i, escenario in enumerate(pendientes):
+        ahorro_mensual = I0[i] - gasto[i]
+        escenario['resultado'] = {
+            "ingreso_neto": float(I0[i]),
+            "ahorro_mensual": float(ahorro_mensual),
+            "factor_ahorro": float(factor[i]),
+            "simple_0": float(ahorro_mensual * meses[i]),
+            "edo_3": float(saldos[R_3][i, meses[i]]),
+            "edo_7": float(saldos[R_7][i, meses[i]]),
+            "serie_7": saldos[R_7][i, :meses[i] + 1].tolist()
+        }
+    return escenarios
+
+def calcular_proyecciones(n_clicks, salario, meses, tasa_crecimiento, file_data, variables_ahorro, solver="analytic",
+                          tasas_barrido=None, inflacion_por_categoria=False, sensibilidad=False, n_sobol=0):
+    """Proyecciones completas para la interfaz; None sin clic, salario o meses.
+
+    La validación va antes de la cache, así un resultado guardado no se devuelve
+    cuando faltan datos.
+    """
+    if not n_clicks or not salario or not meses:
+        return None
+    return _calcular_proyecciones(salario, meses, tasa_crecimiento, file_data, variables_ahorro, solver=solver,
+                                  tasas_barrido=tasas_barrido, inflacion_por_categoria=inflacion_por_categoria,
+                                  sensibilidad=sensibilidad, n_sobol=n_sobol)
+
+@memoizar(cache_resultados)
+@medir("proyecciones")
+def _calcular_proyecciones(salario, meses, tasa_crecimiento, file_data, variables_ahorro, solver="analytic",
+                           tasas_barrido=None, inflacion_por_categoria=False, sensibilidad=False, n_sobol=0):
+    try:
+        salario = float(salario)
+        meses = int(meses)
+        tasa_crecimiento = float(tasa_crecimiento) if tasa_crecimiento else 0.0
+        
+        vars_ahorro = {
+            'expectativas_ingresos': variables_ahorro.get('expectativas_ingresos', 1.0),
+            'tasa_interes': variables_ahorro.get('tasa_interes', 1.0),
+            'inflacion': variables_ahorro.get('inflacion', 1.0),
+            'preferencias_temporales': variables_ahorro.get('preferencias_temporales', 1.0),
+            'educacion_financiera': variables_ahorro.get('educacion_financiera', 1.0),
+            'riesgo_desempleo': variables_ahorro.get('riesgo_desempleo', 1.0),
+            'situacion_familiar': variables_ahorro.get('situacion_familiar', 1.0),
+            'gastos_salud': variables_ahorro.get('gastos_salud', 1.0),
+            'estabilidad_laboral': variables_ahorro.get('estabilidad_laboral', 1.0)
+        }
+        
+        gasto = leer_gastos(file_data)
+        gastos_categoria = leer_categorias(file_data, vars_ahorro['inflacion']) if inflacion_por_categoria else None
+        t, A_3, A_7, I0, factor_ahorro, ahorro_mensual, gasto = resolver_EDO(salario, gasto, tasa_crecimiento, meses, vars_ahorro,
+                                                                             solver=solver, gastos_categoria=gastos_categoria)
+        gasto_final = float(matriz_gastos(*gastos_categoria, t[-1:]).sum()) if gastos_categoria is not None else float(gasto)
+        
+        if ahorro_mensual < 0:
+            A_3[-1] = -1
+            A_7[-1] = -1
+        
+        saldo_simple = ahorro_mensual * meses
+        saldo_3 = serie_uniforme(ahorro_mensual, R_3, meses)
+        saldo_7 = serie_uniforme(ahorro_mensual, R_7, meses)
+
+        proyecciones = {
+            "datos_entrada": {
+                "salario": salario,
+                "meses": meses,
+                "tasa_crecimiento": tasa_crecimiento,
+                "gasto": float(gasto),
+                "gasto_final": gasto_final,
+                "inflacion_por_categoria": gastos_categoria is not None,
+                "ahorro_mensual": float(ahorro_mensual),
+                "ingreso_neto": float(I0),
+                "factor_ahorro": float(factor_ahorro),
+                "variables_ahorro": vars_ahorro
+            },
+            "resultados": {
+                "simple_0": float(saldo_simple),
+                "simple_3": float(saldo_3),
+                "simple_7": float(saldo_7),
+                "edo_3": float(A_3[-1]),
+                "edo_7": float(A_7[-1])
+            },
+            "series": {
+                "t": t.tolist(),
+                "A_3": A_3.tolist(),
+                "A_7": A_7.tolist()
+            }
+        }
+        
+        if tasas_barrido is not None:
+            tasas_anuales = np.asarray(tasas_barrido, dtype=float)
+            _, A_barrido = resolver_EDO_lote(salario, gasto, tasa_crecimiento, meses, vars_ahorro,
+                                             (tasas_anuales / 100) / 12, factores_ahorro=factor_ahorro,
+                                             solver=solver, gastos_categoria=gastos_categoria)
+            proyecciones["barrido"] = {
+                "tasas": tasas_anuales.tolist(),
+                "edo": A_barrido[:, -1].tolist()
+            }
+        
+        if sensibilidad:
+            from sensibilidad import analisis_tornado, analisis_sobol
+            datos_categorias = file_data if gastos_categoria is not None else None
+            with medir("sensibilidad", metodo="tornado"):
+                proyecciones["sensibilidad"] = {
+                    "tornado": analisis_tornado(salario, gasto, tasa_crecimiento, meses, vars_ahorro,
+                                                file_data=datos_categorias)
+                }
+            if n_sobol:
+                with medir("sensibilidad", metodo="sobol"):
+                    proyecciones["sensibilidad"]["sobol"] = analisis_sobol(salario, gasto, tasa_crecimiento, meses,
+                                                                           file_data=datos_categorias,
+                                                                           n_muestras=int(n_sobol))
+        
+        return proyecciones
+    except Exception as e:
+        print(f"Error calculando proyecciones: {str(e)}")
+        contar_error("proyecciones")
+        return None
@@ -1,10 +1,19 @@
+import os
 import dash
+import diskcache
 import dash_bootstrap_components as dbc
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, DiskcacheManager
+import api
 import interfaz
 import generarReporte
+import metricas
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Los reportes PDF se generan en procesos aparte para no bloquear a los workers
+cache_trabajos = diskcache.Cache(os.environ.get('CACHE_TRABAJOS', './cache-trabajos'))
+background_callback_manager = DiskcacheManager(cache_trabajos, expire=600)
+
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP],
+                background_callback_manager=background_callback_manager)
 app.title = "Simulador de Ahorros"
 
 SIDEBAR_STYLE = {
@@ -84,7 +93,8 @@ generarReporte.register_callbacks(app)
 
 # Para deploy - Exponer servidor para Gunicorn en producción
 server = app.server
+api.registrar_api(server)
+metricas.registrar_metricas(server, app.callback_map)
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 8050))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
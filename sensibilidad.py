@@ -0,0 +1,120 @@
+import numpy as np
+from nucleo import R_7, PESOS_FACTOR, calcular_factor_ahorro, leer_categorias, resolver_EDO_lote
+
+# Valores posibles de cada variable (los mismos de los selectores de la interfaz)
+NIVELES_VARIABLES = {
+    'expectativas_ingresos': [0.9, 0.95, 1.0, 1.05, 1.1],
+    'tasa_interes': [0.9, 0.95, 1.0, 1.05, 1.1],
+    'inflacion': [0.95, 1.0, 1.05, 1.1, 1.15],
+    'preferencias_temporales': [0.9, 0.95, 1.0, 1.1, 1.15],
+    'educacion_financiera': [0.9, 0.95, 1.0, 1.1, 1.15],
+    'riesgo_desempleo': [0.9, 0.95, 1.0, 1.1, 1.2],
+    'situacion_familiar': [0.9, 1.0, 1.1, 1.2, 1.25, 1.3],
+    'gastos_salud': [0.9, 0.95, 1.0, 1.1, 1.2],
+    'estabilidad_laboral': [0.9, 0.95, 1.0, 1.1, 1.2]
+}
+
+NOMBRES_VARIABLES = {
+    'expectativas_ingresos': "Expectativas de Ingresos",
+    'tasa_interes': "Tasa de Interés",
+    'inflacion': "Inflación",
+    'preferencias_temporales': "Preferencias Temporales",
+    'educacion_financiera': "Educación Financiera",
+    'riesgo_desempleo': "Riesgo de Desempleo",
+    'situacion_familiar': "Situación Familiar",
+    'gastos_salud': "Gastos de Salud",
+    'estabilidad_laboral': "Estabilidad Laboral"
+}
+
+def evaluar_saldos(salario, gasto, tasa_crecimiento, meses, muestras, r=R_7, file_data=None):
+    """Saldo final del modelo EDO para muchas combinaciones de variables a la vez.
+
+    muestras es un dict {variable: arreglo} con una combinación por posición. El
+    saldo es proporcional a 1/factor_ahorro, así que se resuelve una sola vez con
+    factor 1 y se escala con los factores de todas las combinaciones. Con
+    file_data con categorías la inflación también cambia la tasa de cada gasto,
+    por eso se resuelve una vez por nivel de inflación distinto.
+    """
+    factores = np.atleast_1d(calcular_factor_ahorro(muestras))
+    inflacion = np.broadcast_to(np.asarray(muestras.get('inflacion', 1.0), dtype=float), factores.shape)
+    saldos = np.empty(factores.shape)
+
+    for nivel in np.unique(inflacion):
+        gastos_categoria = leer_categorias(file_data, nivel)
+        _, A = resolver_EDO_lote(salario, gasto, tasa_crecimiento, meses, {}, [r],
+                                 factores_ahorro=1.0, gastos_categoria=gastos_categoria)
+        filas = inflacion == nivel
+        saldos[filas] = A[0, -1] / factores[filas]
+    return saldos
+
+def analisis_tornado(salario, gasto, tasa_crecimiento, meses, variables_ahorro, r=R_7, file_data=None):
+    """Lleva cada variable a su valor mínimo y máximo dejando las demás fijas.
+
+    Las 2 * 9 combinaciones y el caso base se evalúan juntas. Devuelve el saldo
+    base y una lista ordenada de mayor a menor impacto con el saldo en cada extremo.
+    """
+    base = {nombre: float(variables_ahorro.get(nombre, 1.0)) for nombre in PESOS_FACTOR}
+    nombres = list(PESOS_FACTOR)
+    n = 2 * len(nombres) + 1
+    muestras = {nombre: np.full(n, valor) for nombre, valor in base.items()}
+    for i, nombre in enumerate(nombres):
+        muestras[nombre][2 * i] = min(NIVELES_VARIABLES[nombre])
+        muestras[nombre][2 * i + 1] = max(NIVELES_VARIABLES[nombre])
+
+    saldos = evaluar_saldos(salario, gasto, tasa_crecimiento, meses, muestras, r, file_data)
+
+    filas = [
+        {
+            "variable": nombre,
+            "etiqueta": NOMBRES_VARIABLES[nombre],
+            "minimo": float(saldos[2 * i]),
+            "maximo": float(saldos[2 * i + 1]),
+            "impacto": float(abs(saldos[2 * i + 1] - saldos[2 * i]))
+        }
+        for i, nombre in enumerate(nombres)
+    ]
+    filas.sort(key=lambda fila: fila["impacto"], reverse=True)
+    return {"base": float(saldos[-1]), "variables": filas}
+
+def analisis_sobol(salario, gasto, tasa_crecimiento, meses, r=R_7, file_data=None, n_muestras=1024, semilla=0):
+    """Índices de Sobol de primer orden y totales con el esquema de Saltelli.
+
+    Cada variable se sortea uniformemente entre los valores de su selector. Se
+    arman las matrices A, B y las 9 matrices AB_i y las n_muestras * 11
+    combinaciones se evalúan en un solo lote.
+    """
+    rng = np.random.default_rng(semilla)
+    nombres = list(PESOS_FACTOR)
+    d = len(nombres)
+
+    def sortear():
+        return np.column_stack([rng.choice(NIVELES_VARIABLES[nombre], n_muestras) for nombre in nombres])
+
+    A, B = sortear(), sortear()
+    AB = np.repeat(A[np.newaxis], d, axis=0)
+    AB[np.arange(d), :, np.arange(d)] = B.T
+    todas = np.concatenate([A, B, AB.reshape(-1, d)])
+
+    saldos = evaluar_saldos(salario, gasto, tasa_crecimiento, meses,
+                            {nombre: todas[:, i] for i, nombre in enumerate(nombres)}, r, file_data)
+    f_A, f_B = saldos[:n_muestras], saldos[n_muestras:2 * n_muestras]
+    f_AB = saldos[2 * n_muestras:].reshape(d, n_muestras)
+
+    varianza = np.var(np.concatenate([f_A, f_B]))
+    if varianza == 0:
+        primer_orden = total = np.zeros(d)
+    else:
+        primer_orden = np.mean(f_B * (f_AB - f_A), axis=1) / varianza
+        total = 0.5 * np.mean((f_A - f_AB) ** 2, axis=1) / varianza
+
+    filas = [
+        {
+            "variable": nombre,
+            "etiqueta": NOMBRES_VARIABLES[nombre],
+            "primer_orden": float(primer_orden[i]),
+            "total": float(total[i])
+        }
+        for i, nombre in enumerate(nombres)
+    ]
+    filas.sort(key=lambda fila: fila["total"], reverse=True)
+    return {"n_muestras": n_muestras, "variables": filas}